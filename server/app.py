@@ -1,63 +1,30 @@
+import datetime
+import json
+import os
+import sys
 from flask import Flask
 from flask_restful import Api, Resource
-from flask_migrate import Migrate
 from flask_cors import CORS
-from resources.auth_resource import (
-    SignupResource, LoginResource, LogoutResource,
-    LoginGoogle, AuthorizeGoogle, VerifyOTPResource, ResendOTPResource,
-    ForgotPasswordResource, ResetPasswordResource
-)
-from resources.user_resource import UserResource, SingleUser
-from resources.mover_resource import MoverResource, SingleMover, MoverById
-from resources.inventory_resource import InventoryResource, UserInventoryResource, DeleteUserInventoryResource, PatchUserInventoryResource, InventoryItemResource
-from resources.property_resource import PropertyResource
-from resources.move_resource import MovesResource, MoveResource, SingleMove, SingleMoveResource, MovePatchResource
-from resources.quote_resource import QuoteResource, MoveQuotesResource
 from flask_jwt_extended import JWTManager
-from extensions import bcrypt, oauth
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.orm import configure_mappers
+from hashing import hashing
 from models import db
 from dotenv import load_dotenv
-import os
 from blacklist import BLACKLIST
-from oauth_setup import google
-import resend
-import datetime
-
-load_dotenv()
-
-app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY", "a_default_secret_key")
-resend.api_key = os.getenv("RESEND_API_KEY")
-
-# App Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("CONNECTION_STRING")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = 'secret'
-app.config['JWT_BLACKLIST_ENABLED'] = True
-app.config['JWT_BLACKLIST_TOKEN_CHECKS'] = ['access', 'refresh']
-app.config['JWT_TOKEN_LOCATION'] = ['cookies']
-app.config['JWT_ACCESS_COOKIE_NAME'] = 'access_token'
-app.config['JWT_COOKIE_CSRF_PROTECT'] = False
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = datetime.timedelta(days=1)
-app.json.compact = False
+from mailer import init_outbox
+from cache import cache
+from compression import compressor
+from ratelimit import rate_limiter
+from geocoding import geocoder
+from search import catalog_search
+from profiling import profiler
+from metrics import init_metrics, init_jwt, jwt_verified, TimedQueuePool
+from database import engine_options, replica_binds, init_replicas
+from async_db import async_db, async_engine_options
+from oauth_setup import init_oauth, google_client
+from json_provider import FastJSONProvider, output_json
 
-# Initialize extensions
-bcrypt.init_app(app)
-oauth.init_app(app)
-
-CORS(app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:3000"}})
-
-
-migrate = Migrate(app, db)
-db.init_app(app)
-jwt = JWTManager(app)
-
-@jwt.token_in_blocklist_loader
-def check_if_token_revoked(jwt_header, jwt_payload):
-    jti = jwt_payload['jti']
-    return jti in BLACKLIST
-
-api = Api(app)
 
 # Health-check resource
 class Health(Resource):
@@ -65,49 +32,224 @@ class Health(Resource):
         return "Server is up and running"
 
 
-# Auth routes
-api.add_resource(SignupResource, '/auth/signup')
-api.add_resource(LoginResource, '/auth/login')
-api.add_resource(LogoutResource, '/auth/logout')
-api.add_resource(LoginGoogle, '/auth/login/google')
-api.add_resource(AuthorizeGoogle, '/auth/authorize/google', endpoint='authorize_google')
-api.add_resource(VerifyOTPResource, '/auth/verify-otp')
-api.add_resource(ResendOTPResource, '/auth/resend-otp')
-api.add_resource(ForgotPasswordResource, '/auth/forgot-password')
-api.add_resource(ResetPasswordResource, '/auth/reset-password')
-# User Routes
-api.add_resource(UserResource, '/users')
-api.add_resource(SingleUser, '/user')
-
-# Mover Routes
-api.add_resource(MoverResource, '/movers')
-api.add_resource(SingleMover, '/mover')
-api.add_resource(MoverById, '/movers/<int:mover_id>')
-
-# Inventory Route
-api.add_resource(InventoryResource, '/inventory')
-api.add_resource(InventoryItemResource, '/inventory/<int:inventory_id>')
-api.add_resource(UserInventoryResource, '/inventory/user')
-api.add_resource(DeleteUserInventoryResource, '/inventory/user/<int:inventory_user_id>')
-api.add_resource(PatchUserInventoryResource, '/inventory/user/<int:inventory_user_id>')
-
-
-# Property Resource
-api.add_resource(PropertyResource, '/properties')
-
-# Move resource
-api.add_resource(MovesResource, '/moves')
-api.add_resource(MoveResource, '/move')
-api.add_resource(SingleMove, '/move/<int:move_id>')
-api.add_resource(SingleMoveResource, '/moves/<int:move_id>')
-api.add_resource(MovePatchResource, '/moves/<int:move_id>')
-
-# Quote Resource
-api.add_resource(QuoteResource, '/quote')
-api.add_resource(MoveQuotesResource, '/moves/<int:move_id>/quotes')
-
-# Health Routes
-api.add_resource(Health, '/')
+def create_app(config=None):
+    """Build and configure the Flask app.
+
+    Settings come from the environment (and .env); `config` overrides them,
+    e.g. create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True}).
+    Resource modules are imported when the first app is built, not when this
+    module is imported.
+    """
+    load_dotenv()
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.secret_key = os.getenv("SECRET_KEY", "a_default_secret_key")
+
+    # App Configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("CONNECTION_STRING")
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Connection pool and per-statement limits, applied to the primary and every replica.
+    pool_settings = dict(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),
+    )
+    # Comma-separated read replica URLs; read-only GETs are routed to them. After a
+    # write, that client reads from the primary for REPLICA_STICKY_SECONDS.
+    app.config['SQLALCHEMY_BINDS'] = replica_binds([url for url in os.getenv("REPLICA_URLS", "").split(",") if url])
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    app.config['JWT_SECRET_KEY'] = 'secret'
+    app.config['JWT_BLACKLIST_ENABLED'] = True
+    app.config['JWT_BLACKLIST_TOKEN_CHECKS'] = ['access', 'refresh']
+    app.config['JWT_TOKEN_LOCATION'] = ['cookies']
+    app.config['JWT_ACCESS_COOKIE_NAME'] = 'access_token'
+    app.config['JWT_COOKIE_CSRF_PROTECT'] = False
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = datetime.timedelta(days=1)
+    # Password hashing runs on a bounded process pool (HASH_WORKERS=0 hashes inline).
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    app.config['HASH_WORKERS'] = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+    app.config['HASH_QUEUE_LIMIT'] = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+    # redis:// URL shared by all workers; unset keeps revocations in-process.
+    # Each worker reads revocations made by the others every REVOCATION_CACHE_SECONDS.
+    app.config['REVOCATION_STORE_URL'] = os.getenv("REVOCATION_STORE_URL")
+    app.config['REVOCATION_CACHE_SECONDS'] = float(os.getenv("REVOCATION_CACHE_SECONDS", "1"))
+    # Outbound email is queued in email_outbox and drained in the background.
+    app.config['RESEND_API_KEY'] = os.getenv("RESEND_API_KEY")
+    app.config['EMAIL_TRANSPORT'] = os.getenv("EMAIL_TRANSPORT", "resend")
+    app.config['EMAIL_WORKER_ENABLED'] = os.getenv("EMAIL_WORKER_ENABLED", "1") == "1"
+    app.config['EMAIL_WORKER_CONCURRENCY'] = int(os.getenv("EMAIL_WORKER_CONCURRENCY", "1"))
+    # Reference data cache; CACHE_URL (redis://) adds a tier shared by all workers.
+    app.config['CACHE_URL'] = os.getenv("CACHE_URL")
+    app.config['CACHE_TTL'] = int(os.getenv("CACHE_TTL", "300"))
+    app.config['CACHE_LOCAL_TTL'] = int(os.getenv("CACHE_LOCAL_TTL", "10"))
+    # Pricing rate card overrides as JSON, e.g. {"per_km": 2.5, "base_fee": 60}
+    app.config['RATE_CARD'] = json.loads(os.getenv("RATE_CARD", "{}"))
+    # Address geocoding: "nominatim", "fake" (offline, deterministic) or "none" (cached results only).
+    # Requests only read stored results; `python geocoding.py --interval 60` looks up new addresses.
+    app.config['GEOCODER'] = os.getenv("GEOCODER", "none")
+    app.config['GEOCODER_URL'] = os.getenv("GEOCODER_URL")
+    app.config['GEOCODER_USER_AGENT'] = os.getenv("GEOCODER_USER_AGENT")
+    app.config['GEOCODER_COUNTRY_CODES'] = os.getenv("GEOCODER_COUNTRY_CODES", "ke")
+    # How often each worker checks the inventory catalog for changes to re-index.
+    app.config['SEARCH_REFRESH_SECONDS'] = float(os.getenv("SEARCH_REFRESH_SECONDS", "5"))
+    # SQL profiling: a statement repeated more than SQL_N_PLUS_ONE_THRESHOLD times in one
+    # request is reported as a likely N+1; slower than SQL_SLOW_QUERY_MS is logged with EXPLAIN.
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    app.config['SQL_SLOW_QUERY_MS'] = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    app.config['SQL_EXPLAIN_SLOW'] = os.getenv("SQL_EXPLAIN_SLOW", "1") == "1"
+    # /metrics and /metrics/sql answer only requests with "Authorization: Bearer
+    # <METRICS_TOKEN>", and 404 while it is unset.
+    app.config['METRICS_TOKEN'] = os.getenv("METRICS_TOKEN")
+    # Response compression: bodies from COMPRESS_MIN_SIZE bytes up are sent with
+    # brotli (quality COMPRESS_BR_QUALITY, if installed) or gzip (COMPRESS_LEVEL).
+    app.config['COMPRESS_ENABLED'] = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv("COMPRESS_LEVEL", "6"))
+    app.config['COMPRESS_BR_QUALITY'] = int(os.getenv("COMPRESS_BR_QUALITY", "4"))
+    # Auth/OTP throttling, per client IP and per email; counters shared between
+    # workers through RATELIMIT_STORE_URL (redis://...), per process when unset.
+    app.config['RATELIMIT_ENABLED'] = os.getenv("RATELIMIT_ENABLED", "1") == "1"
+    app.config['RATELIMIT_STORE_URL'] = os.getenv("RATELIMIT_STORE_URL")
+    app.config['RATELIMITS'] = json.loads(os.getenv("RATELIMITS", "{}"))
+    # Number of reverse proxies in front of the app whose X-Forwarded-* headers
+    # are trusted. Behind one, remote_addr is the proxy's address, and every
+    # client would share a single per-IP rate limit. Leave at 0 when clients
+    # connect directly: the headers could then be forged.
+    app.config['PROXY_HOPS'] = int(os.getenv("PROXY_HOPS", "0"))
+    # Explicit overrides (tests, scripts) win; engine options follow the final URI.
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], poolclass=TimedQueuePool, **pool_settings
+    ))
+    # The same limits for the asyncpg engines used under asgi.py (async_db).
+    app.config.setdefault('ASYNC_SQLALCHEMY_ENGINE_OPTIONS', async_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], **pool_settings
+    ))
+
+    hops = app.config['PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
+    # Initialize extensions
+    hashing.init_app(app)
+    init_oauth(app)
+    BLACKLIST.init_app(app)
+    rate_limiter.init_app(app)
+    init_outbox(app)
+    cache.init_app(app)
+    geocoder.init_app(app)
+    catalog_search.init_app(app)
+    profiler.init_app(app)
+    init_metrics(app)
+    # After init_metrics, so the size metrics see the compressed bodies.
+    compressor.init_app(app)
+    init_replicas(app)
+    async_db.init_app(app)
+
+    CORS(app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:3000"}})
+
+    # Flask-Migrate (and alembic under it) only serves the `flask db` commands.
+    # Flask imports that CLI plugin before it loads the app, so web workers and
+    # scripts never pay for the import.
+    if 'flask_migrate' in sys.modules:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    db.init_app(app)
+    jwt = JWTManager(app)
+    init_jwt(jwt)
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        jti = jwt_payload['jti']
+        revoked = jti in BLACKLIST
+        jwt_verified()
+        return revoked
+
+    api = Api(app)
+    api.representation('application/json')(output_json)
+    register_routes(api)
+    return app
+
+
+def register_routes(api):
+    from resources.auth_resource import (
+        SignupResource, LoginResource, LogoutResource,
+        LoginGoogle, AuthorizeGoogle, VerifyOTPResource, ResendOTPResource,
+        ForgotPasswordResource, ResetPasswordResource
+    )
+    from resources.user_resource import UserResource, SingleUser
+    from resources.mover_resource import MoverResource, SingleMover, MoverById, MoverMatchesResource
+    from resources.inventory_resource import InventoryResource, UserInventoryResource, DeleteUserInventoryResource, PatchUserInventoryResource, InventoryItemResource, BatchUserInventoryResource, InventorySearchResource
+    from resources.property_resource import PropertyResource
+    from resources.move_resource import MovesResource, MoveResource, SingleMove, SingleMoveResource, MovePatchResource, MoveDetailResource
+    from resources.quote_resource import QuoteResource, MoveQuotesResource
+    from resources.metrics_resource import MetricsResource, SQLMetricsResource
+
+    # Auth routes
+    api.add_resource(SignupResource, '/auth/signup')
+    api.add_resource(LoginResource, '/auth/login')
+    api.add_resource(LogoutResource, '/auth/logout')
+    api.add_resource(LoginGoogle, '/auth/login/google')
+    api.add_resource(AuthorizeGoogle, '/auth/authorize/google', endpoint='authorize_google')
+    api.add_resource(VerifyOTPResource, '/auth/verify-otp')
+    api.add_resource(ResendOTPResource, '/auth/resend-otp')
+    api.add_resource(ForgotPasswordResource, '/auth/forgot-password')
+    api.add_resource(ResetPasswordResource, '/auth/reset-password')
+    # User Routes
+    api.add_resource(UserResource, '/users')
+    api.add_resource(SingleUser, '/user')
+
+    # Mover Routes
+    api.add_resource(MoverResource, '/movers')
+    api.add_resource(SingleMover, '/mover')
+    api.add_resource(MoverById, '/movers/<int:mover_id>')
+    api.add_resource(MoverMatchesResource, '/movers/matches')
+
+    # Inventory Route
+    api.add_resource(InventoryResource, '/inventory')
+    api.add_resource(InventorySearchResource, '/inventory/search')
+    api.add_resource(InventoryItemResource, '/inventory/<int:inventory_id>')
+    api.add_resource(UserInventoryResource, '/inventory/user')
+    api.add_resource(BatchUserInventoryResource, '/inventory/user/batch')
+    api.add_resource(DeleteUserInventoryResource, '/inventory/user/<int:inventory_user_id>')
+    api.add_resource(PatchUserInventoryResource, '/inventory/user/<int:inventory_user_id>')
+
+
+    # Property Resource
+    api.add_resource(PropertyResource, '/properties')
+
+    # Move resource
+    api.add_resource(MovesResource, '/moves')
+    api.add_resource(MoveResource, '/move')
+    api.add_resource(SingleMove, '/move/<int:move_id>')
+    api.add_resource(SingleMoveResource, '/moves/<int:move_id>')
+    api.add_resource(MovePatchResource, '/moves/<int:move_id>')
+    api.add_resource(MoveDetailResource, '/moves/<int:move_id>/detail')
+
+    # Quote Resource
+    api.add_resource(QuoteResource, '/quote')
+    api.add_resource(MoveQuotesResource, '/moves/<int:move_id>/quotes')
+
+    # Health Routes
+    api.add_resource(Health, '/')
+    api.add_resource(MetricsResource, '/metrics')
+    api.add_resource(SQLMetricsResource, '/metrics/sql')
+
+
+def warm_up(app):
+    """One-off work that every worker would otherwise repeat on its first requests.
+
+    Called by gunicorn.conf.py in the master before it forks, so the workers
+    share the result. Opens no connections and starts no threads.
+    """
+    with app.app_context():
+        configure_mappers()
+        google_client()
+
 
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
@@ -0,0 +1,60 @@
+"""ASGI entry point.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 4
+
+The server's event loop owns the sockets, so idle and slow clients cost no
+thread. Flask still runs each request on a thread from a pool of
+ASGI_THREADS. The list endpoints (GET /users, /moves) run their queries
+as coroutines on the server loop through async_db, over one asyncpg pool
+shared across requests, rather than holding a pooled psycopg2 connection
+each. Under gunicorn the same handlers use the synchronous pool.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from app import create_app
+from async_db import async_db
+
+
+# asgiref runs WSGI apps thread-sensitively, i.e. every request on one shared
+# thread. _Instance runs them on our own pool instead (the loop's default
+# executor until lifespan startup has created it).
+_run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+
+
+class _Instance(WsgiToAsgiInstance):
+    run_sync = SyncToAsync(_run_wsgi_app, thread_sensitive=False)
+
+    async def run_wsgi_app(self, body):
+        await self.run_sync(body)
+
+
+class FlaskASGI(WsgiToAsgi):
+    def __init__(self, wsgi_application, threads):
+        super().__init__(wsgi_application)
+        self.threads = threads
+        self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        await _Instance(self.wsgi_application)(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='flask')
+                _Instance.run_sync = SyncToAsync(_run_wsgi_app, thread_sensitive=False, executor=self.executor)
+                async_db.bind_loop(asyncio.get_running_loop())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+application = FlaskASGI(create_app(), threads=int(os.getenv("ASGI_THREADS", "64")))
@@ -0,0 +1,102 @@
+import asyncio
+from flask import current_app, g, has_request_context
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from database import REPLICA_PREFIX
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+
+def async_url(url):
+    # postgresql:// (psycopg2) -> postgresql+asyncpg://. asyncpg has no
+    # libpq query options, so sslmode becomes its `ssl` argument.
+    url = make_url(url)
+    url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+    if url.get_backend_name() == 'postgresql' and 'sslmode' in url.query:
+        sslmode = url.query['sslmode']
+        url = url.difference_update_query(['sslmode']).update_query_dict({'ssl': sslmode})
+    return url
+
+
+def async_engine_options(database_uri, pool_size=None, max_overflow=None, pool_timeout=None,
+                         pool_recycle=None, pool_pre_ping=True, statement_timeout_ms=None):
+    # Same settings as database.engine_options, in asyncpg's terms.
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    options = {'pool_pre_ping': pool_pre_ping}
+    for key, value in (('pool_size', pool_size), ('max_overflow', max_overflow),
+                       ('pool_timeout', pool_timeout), ('pool_recycle', pool_recycle)):
+        if value is not None:
+            options[key] = value
+    if statement_timeout_ms:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(int(statement_timeout_ms))}}
+    return options
+
+
+class AsyncDatabase:
+    """AsyncSession factory over asyncpg, alongside the synchronous `db`.
+
+    Only used under asgi.py, whose lifespan binds the server's event loop
+    with bind_loop(). Handlers stay synchronous and check `serving`: on the
+    ASGI server they hand their reads to run(), which executes them on that
+    loop over one pooled engine per bind; under gunicorn/WSGI they use
+    db.session as before. (Running coroutines under WSGI would cost a fresh
+    event loop and a fresh connection per request.)
+    """
+
+    def __init__(self):
+        self.urls = {}
+        self.options = {}
+        self._loop = None
+        self._engines = {}
+
+    def init_app(self, app):
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+        if not uri:
+            return
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        self.urls = {None: async_url(uri)}
+        self.urls.update({key: async_url(url) for key, url in binds.items() if key.startswith(REPLICA_PREFIX)})
+        self.options = app.config.get('ASYNC_SQLALCHEMY_ENGINE_OPTIONS', {})
+        self._engines = {}
+        app.extensions['async_db'] = self
+
+    @property
+    def serving(self):
+        return self._loop is not None
+
+    def bind_loop(self, loop):
+        self._loop = loop
+
+    async def dispose(self):
+        for engine in self._engines.values():
+            await engine.dispose()
+        self._engines.clear()
+        self._loop = None
+
+    def engine(self, key=None):
+        if self._loop is None or asyncio.get_running_loop() is not self._loop:
+            raise RuntimeError("async_db engines only run on the ASGI server loop")
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = self._engines[key] = create_async_engine(self.urls[key], **self.options)
+        return engine
+
+    def session(self):
+        # Inside a @read_replica handler, reads go to the replica it picked.
+        replica = g.get('db_replica') if has_request_context() else None
+        return AsyncSession(self.engine(replica if replica in self.urls else None), expire_on_commit=False)
+
+    def run(self, fn, *args):
+        """`await fn(session, *args)` on the server loop, from a request thread.
+
+        The thread waits for the result, but the query itself runs on the
+        loop over the asyncpg pool, not on a pooled psycopg2 connection.
+        """
+        async def call():
+            async with self.session() as session:
+                return await fn(session, *args)
+        return current_app.ensure_sync(call)()
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,126 @@
+"""Concurrency benchmark: threaded WSGI (gunicorn) vs ASGI (uvicorn asgi.py).
+
+Usage:
+    python benchmarks/bench_async.py [--concurrency 1000] [--requests 10000]
+        [--path /moves?limit=20] [--workers 1] [--threads 32]
+        [--wsgi-url http://host:port] [--asgi-url http://host:port]
+
+Without URLs, both servers are started here on free ports, with the same
+environment and worker count. Each one then gets --requests requests over
+--concurrency simultaneous keep-alive connections (httpx), logged in as the
+bulk-seeded user (python seed.py --bulk). Reports throughput, p50/p99 and
+errors (timeouts, refused connections, 5xx) per mode.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn(mode, workers, threads):
+    port = free_port()
+    if mode == 'wsgi':
+        cmd = ['gunicorn', '-w', str(workers), '--threads', str(threads), '-b', f'127.0.0.1:{port}', 'app:create_app()']
+    else:
+        cmd = ['uvicorn', 'asgi:application', '--workers', str(workers), '--port', str(port), '--log-level', 'warning']
+    env = dict(os.environ, ASGI_THREADS=str(threads))
+    process = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(300):
+        try:
+            httpx.get(url + '/', timeout=1)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit(f"{mode} server did not start: {' '.join(cmd)}")
+
+
+async def login(url, email, password):
+    async with httpx.AsyncClient(base_url=url) as client:
+        response = await client.post('/auth/login', json={"email": email, "password": password})
+        if response.status_code != 200:
+            raise SystemExit(f"Login failed ({response.status_code}). Seed with: python seed.py --bulk")
+        return response.json()["access_token"]
+
+
+async def drive(url, path, token, concurrency, total, timeout):
+    latencies, errors = [], {}
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout,
+                                 cookies={"access_token": token}) as client:
+        async def connection():
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 500:
+                        errors[response.status_code] = errors.get(response.status_code, 0) + 1
+                        continue
+                except httpx.HTTPError as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def report(mode, latencies, errors, elapsed):
+    print(f"{mode:<5} {len(latencies):>7} ok {sum(errors.values()):>6} errors {len(latencies) / elapsed:>8.1f} req/s "
+          f"p50 {percentile(latencies, 50) * 1000:>8.1f} ms  p99 {percentile(latencies, 99) * 1000:>8.1f} ms"
+          + (f"  {errors}" if errors else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--path', default='/moves?limit=20')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=32, help="gunicorn threads / ASGI_THREADS per worker")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--wsgi-url')
+    parser.add_argument('--asgi-url')
+    parser.add_argument('--email', default='user1@loadtest.example')
+    parser.add_argument('--password', default='loadtest-password')
+    args = parser.parse_args()
+
+    print(f"{args.requests} x GET {args.path} over {args.concurrency} connections")
+    for mode, url in (('wsgi', args.wsgi_url), ('asgi', args.asgi_url)):
+        process = None
+        if url is None:
+            process, url = spawn(mode, args.workers, args.threads)
+        try:
+            token = asyncio.run(login(url, args.email, args.password))
+            report(mode, *asyncio.run(drive(url, args.path, token, args.concurrency, args.requests, args.timeout)))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""CPU cost against bytes saved for response compression.
+
+Usage: python benchmarks/bench_compression.py [--rows 1000 10000] [--mbps 2] [--repeat 3]
+
+Payloads are the JSON bodies of GET /users, /moves, /inventory and /movers,
+built from synthetic rows (see bench_json.py) and encoded with
+json_provider.dumps. Each is compressed at several gzip levels and brotli
+qualities (when brotli is installed), both as one body and as a stream of
+1000-row chunks flushed one by one, the way streamed NDJSON responses are.
+"total" adds the compression time to the time the body takes over a
+--mbps link, i.e. what a client on that network waits for.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_json import ENDPOINTS, fake_rows
+from compression import Compressor, brotli
+from json_provider import dumps
+
+CHUNK_ROWS = 1000
+
+
+def settings():
+    yield 'identity', None, None
+    for level in (1, 6, 9):
+        yield f'gzip-{level}', 'gzip', Compressor(level=level)
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            yield f'br-{quality}', 'br', Compressor(brotli_quality=quality)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--mbps', type=float, default=2.0, help="client link speed in Mbit/s")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bytes_per_second = args.mbps * 1e6 / 8
+    if brotli is None:
+        print("brotli is not installed; gzip only")
+    print(f"{'endpoint':<11} {'rows':>6} {'encoding':<9} {'mode':<6} {'cpu ms':>8} {'KB':>9} {'ratio':>6} "
+          f"{f'total ms @{args.mbps:g}Mbps':>20}")
+    for path, key, serializer in ENDPOINTS:
+        for n in args.rows:
+            encoded = serializer.rows(fake_rows(serializer, n))
+            body = dumps({key: encoded})
+            chunks = [b''.join(dumps(row) + b'\n' for row in encoded[i:i + CHUNK_ROWS])
+                      for i in range(0, n, CHUNK_ROWS)]
+            for name, encoding, compressor in settings():
+                modes = [('body', lambda: len(body)), ('stream', lambda: sum(map(len, chunks)))]
+                if compressor is not None:
+                    modes = [
+                        ('body', lambda: len(compressor.compress(body, encoding))),
+                        ('stream', lambda: sum(map(len, compressor.compress_stream(iter(chunks), encoding)))),
+                    ]
+                for mode, fn in modes:
+                    seconds, size = best_of(fn, args.repeat)
+                    raw = len(body) if mode == 'body' else sum(map(len, chunks))
+                    total = seconds + size / bytes_per_second
+                    print(f"{path:<11} {n:>6} {name:<9} {mode:<6} {seconds * 1000:>8.1f} {size / 1024:>9.1f} "
+                          f"{raw / size:>5.1f}x {total * 1000:>20.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Startup benchmark: how long a fresh process takes to get a usable app.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 10] [--tree PATH] [--gunicorn 4]
+
+Each run is a new interpreter (nothing cached in sys.modules) that times
+`import app`, building the app and its first request through the test
+client. --tree points at another checkout of server/ to compare against,
+e.g. `git worktree add /tmp/base <rev>` then --tree /tmp/base/server; trees
+from before create_app() build the app at import, which shows up in the
+import column. --gunicorn N also starts gunicorn with N workers, with and
+without PRELOAD_APP, and times how long until it answers its first request.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+application = module.create_app() if hasattr(module, 'create_app') else module.app
+created = time.perf_counter()
+application.test_client().get('/')
+served = time.perf_counter()
+print(imported - started, created - imported, served - created)
+"""
+
+
+def environment():
+    env = dict(os.environ, EMAIL_WORKER_ENABLED='0', SQL_EXPLAIN_SLOW='0')
+    env.setdefault('CONNECTION_STRING', 'sqlite://')
+    return env
+
+
+def probe(tree, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=tree, env=environment(),
+                                capture_output=True, text=True, check=True).stdout
+        total = time.perf_counter() - start
+        samples.append([*map(float, output.split()[-3:]), total])
+    return samples
+
+
+def report(label, samples):
+    columns = list(zip(*samples))
+    medians = [statistics.median(column) * 1000 for column in columns]
+    print(f"{label:<24} import {medians[0]:>7.1f} ms  create_app {medians[1]:>7.1f} ms  "
+          f"first request {medians[2]:>6.1f} ms  process {medians[3]:>7.1f} ms")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def gunicorn_ready(tree, workers, preload):
+    import httpx
+
+    port = free_port()
+    env = dict(environment(), PRELOAD_APP='1' if preload else '0')
+    start = time.perf_counter()
+    process = subprocess.Popen(['gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}'],
+                               cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while process.poll() is None:
+            try:
+                httpx.get(f'http://127.0.0.1:{port}/', timeout=1)
+                return time.perf_counter() - start
+            except httpx.HTTPError:
+                time.sleep(0.02)
+        raise SystemExit(f"gunicorn exited with {process.returncode}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--tree', help="another server/ directory to compare with")
+    parser.add_argument('--gunicorn', type=int, metavar='WORKERS', help="also time gunicorn startup")
+    args = parser.parse_args()
+
+    trees = [('this tree', SERVER_DIR)] + ([(args.tree, args.tree)] if args.tree else [])
+    print(f"median of {args.runs} fresh processes")
+    for label, tree in trees:
+        report(label, probe(tree, args.runs))
+    if args.gunicorn:
+        for preload in (False, True):
+            ready = statistics.median(gunicorn_ready(SERVER_DIR, args.gunicorn, preload) for _ in range(3))
+            print(f"gunicorn -w {args.gunicorn} {'preload' if preload else 'no preload':<11} "
+                  f"first response after {ready * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
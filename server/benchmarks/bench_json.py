@@ -0,0 +1,113 @@
+"""Compare JSON encoders on the payloads of the large list endpoints.
+
+Usage: python benchmarks/bench_json.py [--sizes 1000 10000 100000] [--repeat 3]
+
+Rows are synthesized in memory for each serializer (GET /users, /moves,
+/inventory, /movers), wrapped the way the endpoint wraps them, and encoded
+with:
+
+  indented   json.dumps(indent=2), what app.json.compact = False produced
+  restful    json.dumps with default separators, Flask-RESTful's output_json
+  compact    the stdlib fallback of json_provider.dumps
+  provider   json_provider.dumps (orjson when installed)
+
+"native" re-runs the provider on rows that still hold datetime/time objects,
+as returned by move_fields(). No database is needed.
+"""
+import argparse
+import datetime
+import decimal
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_provider
+from models import user_serializer, move_serializer, inventory_serializer, mover_serializer
+
+ENDPOINTS = (
+    ('/users', 'users', user_serializer),
+    ('/moves', 'moves', move_serializer),
+    ('/inventory', 'inventory', inventory_serializer),
+    ('/movers', 'movers', mover_serializer),
+)
+
+BASE = datetime.datetime(2025, 1, 1, 9, 30)
+
+
+def fake_value(python_type, key, i):
+    if python_type is bool:
+        return i % 2 == 0
+    if python_type is int:
+        return i
+    if python_type is float:
+        return i * 1.25
+    if python_type is decimal.Decimal:
+        return decimal.Decimal(i) / 4
+    if python_type is datetime.datetime:
+        return BASE + datetime.timedelta(minutes=i)
+    if python_type is datetime.date:
+        return (BASE + datetime.timedelta(days=i % 365)).date()
+    if python_type is datetime.time:
+        return datetime.time(i % 24, i % 60)
+    return f"{key} {i}"
+
+
+def fake_rows(serializer, n):
+    columns = serializer.model.__table__.columns
+    types = []
+    for key in serializer.keys:
+        try:
+            types.append((key, columns[key].type.python_type))
+        except NotImplementedError:
+            types.append((key, str))
+    return [tuple(fake_value(python_type, key, i) for key, python_type in types) for i in range(1, n + 1)]
+
+
+def encoders():
+    compact = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False,
+                               default=json_provider._default).encode
+    return (
+        ('indented', lambda obj: json.dumps(obj, indent=2).encode('utf-8')),
+        ('restful', lambda obj: json.dumps(obj).encode('utf-8')),
+        ('compact', lambda obj: compact(obj).encode('utf-8')),
+        ('provider', json_provider.dumps),
+    )
+
+
+def best_of(fn, payload, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(payload)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backend = 'orjson' if json_provider.orjson is not None else 'stdlib fallback'
+    print(f"json_provider backend: {backend}")
+    print(f"{'endpoint':<11} {'rows':>7} {'encoder':<9} {'ms':>9} {'MB':>7} {'speedup':>8}")
+    for path, key, serializer in ENDPOINTS:
+        for n in args.sizes:
+            rows = fake_rows(serializer, n)
+            payload = {key: serializer.rows(rows)}
+            baseline = None
+            for name, fn in encoders():
+                seconds, size = best_of(fn, payload, args.repeat)
+                baseline = baseline or seconds
+                print(f"{path:<11} {n:>7} {name:<9} {seconds * 1000:>9.1f} {size / 1e6:>7.2f} {baseline / seconds:>7.1f}x")
+            native = {key: [dict(zip(serializer.keys, row)) for row in rows]}
+            seconds, size = best_of(json_provider.dumps, native, args.repeat)
+            print(f"{path:<11} {n:>7} {'native':<9} {seconds * 1000:>9.1f} {size / 1e6:>7.2f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Per-request cost of the metrics instrumentation.
+
+Usage: python benchmarks/bench_metrics.py [--requests 200000] [--threads 1 4]
+
+Replays the recording path that the metrics hooks run for every request.
+That is the in-flight gauge going up and down, plus one record() holding
+the count, latency and response size. No app or database is needed.
+Reports the cost per request.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import HTTP, registry
+
+ENDPOINTS = ['/moves', '/movers', '/inventory', '/inventory/search', '/moves/<int:move_id>/detail']
+
+
+def record(n, offset):
+    for i in range(n):
+        endpoint = ENDPOINTS[(i + offset) % len(ENDPOINTS)]
+        HTTP.started(endpoint)
+        HTTP.record('GET', endpoint, 200, 0.004, 2048)
+        HTTP.finished(endpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        per_thread = args.requests // threads
+        workers = [threading.Thread(target=record, args=(per_thread, t)) for t in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        print(f"{threads} thread(s): {elapsed / (per_thread * threads) * 1e6:.2f} us per request (wall clock)")
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"render: {(time.perf_counter() - start) * 1000:.2f} ms, {len(text)} bytes")
+
+
+if __name__ == '__main__':
+    main()
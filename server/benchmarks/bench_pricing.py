@@ -0,0 +1,73 @@
+"""Microbenchmark for pricing.price_vector against a per-move Python loop.
+
+Usage: python benchmarks/bench_pricing.py [--moves 1000 10000 100000] [--items-per-user 30]
+
+Uses synthetic arrays only, so no database is needed. This measures the
+pricing arithmetic itself, not the inventory query.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pricing import RateCard, price_vector
+
+
+def synthetic(n_moves, items_per_user, rng):
+    n_items = n_moves * items_per_user
+    return dict(
+        move_owner=np.arange(n_moves),
+        distance=rng.uniform(1, 200, n_moves),
+        item_owner=np.repeat(np.arange(n_moves), items_per_user),
+        quantity=rng.integers(1, 5, n_items).astype(np.float64),
+        volume=np.where(rng.random(n_items) < 0.1, np.nan, rng.uniform(0.05, 3, n_items)),
+        weight=np.where(rng.random(n_items) < 0.1, np.nan, rng.uniform(1, 120, n_items)),
+        multiplier=rng.choice([1.0, 1.15], n_items),
+    )
+
+
+def loop_prices(rate_card, move_owner, distance, item_owner, quantity, volume, weight, multiplier):
+    goods = {}
+    for owner, q, v, w, m in zip(item_owner.tolist(), quantity.tolist(), volume.tolist(),
+                                 weight.tolist(), multiplier.tolist()):
+        v = rate_card.default_volume_m3 if v != v else v
+        w = rate_card.default_weight_kg if w != w else w
+        goods[owner] = goods.get(owner, 0.0) + q * (v * rate_card.per_m3 + w * rate_card.per_kg) * m
+    return [
+        round(rate_card.base_fee + rate_card.per_km * d + goods.get(o, 0.0), 2)
+        for o, d in zip(move_owner.tolist(), distance.tolist())
+    ]
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--moves', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--items-per-user', type=int, default=30)
+    args = parser.parse_args()
+
+    rate_card = RateCard()
+    rng = np.random.default_rng(42)
+    print(f"{'moves':>8} {'items':>9} {'loop (ms)':>10} {'numpy (ms)':>11} {'speedup':>8}")
+    for n in args.moves:
+        data = synthetic(n, args.items_per_user, rng)
+        assert np.allclose(loop_prices(rate_card, **data), price_vector(rate_card, **data))
+        slow = best_of(lambda: loop_prices(rate_card, **data), repeat=3)
+        fast = best_of(lambda: price_vector(rate_card, **data))
+        print(f"{n:>8} {n * args.items_per_user:>9} {slow * 1000:>10.1f} {fast * 1000:>11.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
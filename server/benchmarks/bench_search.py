@@ -0,0 +1,75 @@
+"""Latency benchmark for the inventory typeahead index (search.CatalogIndex).
+
+Usage: python benchmarks/bench_search.py [--items 100000] [--queries 5000] [--limit 10]
+
+Builds an index over synthetic item names and replays typeahead prefixes
+of 1-3 words, with and without a property filter. Reports build time and
+per-query p50/p95/p99. Uses synthetic data only, so no database is needed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import CatalogIndex
+
+ADJECTIVES = ['small', 'large', 'wooden', 'glass', 'leather', 'metal', 'antique', 'folding', 'corner', 'double',
+              'single', 'king', 'queen', 'outdoor', 'kids', 'office', 'kitchen', 'bathroom', 'garden', 'storage']
+NOUNS = ['sofa', 'table', 'chair', 'bed', 'wardrobe', 'desk', 'shelf', 'cabinet', 'mirror', 'lamp', 'rug',
+         'fridge', 'cooker', 'microwave', 'television', 'stool', 'bench', 'dresser', 'mattress', 'bookcase']
+
+
+def synthetic(n, rng):
+    names = [
+        f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}"
+        if i % 3 else f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        for i in range(n)
+    ]
+    property_ids = [rng.randint(1, 4) for _ in range(n)]
+    documents = [{"id": i + 1, "item_name": name, "property_id": p} for i, (name, p) in enumerate(zip(names, property_ids))]
+    return list(range(1, n + 1)), names, property_ids, documents
+
+
+def queries(n, rng):
+    out = []
+    for _ in range(n):
+        words = rng.sample(ADJECTIVES + NOUNS, rng.randint(1, 3))
+        # Typeahead: the last word is usually incomplete.
+        words[-1] = words[-1][:rng.randint(1, len(words[-1]))]
+        out.append((' '.join(words), rng.choice([None, None, rng.randint(1, 4)])))
+    return out
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=5_000)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    data = synthetic(args.items, rng)
+    start = time.perf_counter()
+    index = CatalogIndex(*data)
+    print(f"built index over {len(index)} items in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    timings = []
+    for query, property_id in queries(args.queries, rng):
+        start = time.perf_counter()
+        index.search(query, args.limit, property_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{args.queries} queries: p50 {percentile(timings, 50):.3f} ms, "
+          f"p95 {percentile(timings, 95):.3f} ms, p99 {percentile(timings, 99):.3f} ms, "
+          f"max {max(timings):.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Compare SerializerMixin.to_dict with the precompiled RowSerializer.
+
+Usage: python benchmarks/bench_serializers.py [--sizes 10000 100000 1000000]
+
+Each run seeds an in-memory SQLite database with N moves and times the full
+fetch + serialize path of GET /moves both ways.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, User, Move, move_serializer
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed_moves(n):
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [{"id": 1, "name": "bench", "email": "bench@example.com"}])
+    now = datetime.datetime(2025, 1, 1)
+    batch = []
+    for i in range(1, n + 1):
+        batch.append({
+            "id": i,
+            "user_id": 1,
+            "from_address": f"{i} Main St",
+            "to_address": f"{i} Oak St",
+            "move_date": now,
+            "move_time": datetime.time(10, 30),
+            "move_status": "Pending",
+            "estimated_price": 250.0,
+            "created_at": now,
+            "updated_at": now,
+        })
+        if len(batch) == 50_000:
+            db.session.execute(db.insert(Move), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Move), batch)
+    db.session.commit()
+
+
+def time_it(fn):
+    db.session.expunge_all()
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def with_to_dict():
+    return [m.to_dict(rules=("-bookings", "-quotes", "-user")) for m in Move.query.all()]
+
+
+def with_row_serializer():
+    return move_serializer.rows(db.session.execute(move_serializer.select()).all())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        print(f"{'rows':>10} {'to_dict (s)':>12} {'RowSerializer (s)':>18} {'speedup':>8}")
+        for n in args.sizes:
+            seed_moves(n)
+            slow, expected = time_it(with_to_dict)
+            fast, actual = time_it(with_row_serializer)
+            assert expected == actual, "serializers disagree"
+            print(f"{n:>10} {slow:>12.3f} {fast:>18.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""Load test that drives every route registered on the Flask app.
+
+Usage:
+    python seed.py --bulk --users 1000 --moves 10000      # dataset (once)
+    python benchmarks/loadtest.py [--url http://localhost:5000] [--concurrency 8]
+        [--requests 200] [--writes] [--only /moves ...]
+        [--save-baseline benchmarks/baseline.json] [--compare benchmarks/baseline.json]
+
+By default the app runs in process through Flask test clients. With --url
+the same scenarios go over HTTP to a running server instead; start that
+one with RATELIMIT_ENABLED=0, or /auth/login soon answers 429, and pass
+its METRICS_TOKEN in the environment for the /metrics routes. Each route
+gets its own phase: --concurrency threads share --requests requests. The
+report gives p50/p95/p99 latency, throughput, errors and queries per
+request. Queries are read from the Server-Timing header that the app adds
+to every response.
+
+Routes with no scenario, or skipped on purpose (emails, OAuth, logout),
+are listed. Write scenarios only run with --writes, because they modify
+the seeded data.
+
+--compare exits non-zero when a route's p95 gets worse by more than
+--tolerance or its queries per request go up. That lets CI stop a deploy.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# (method, rule) -> (path builder, body builder or None, is_write)
+SCENARIOS = {
+    ('GET', '/'): (lambda ctx: '/', None, False),
+    ('GET', '/metrics'): (lambda ctx: '/metrics', None, False),
+    ('GET', '/metrics/sql'): (lambda ctx: '/metrics/sql', None, False),
+    ('POST', '/auth/login'): (lambda ctx: '/auth/login', lambda ctx: ctx.credentials, False),
+    ('GET', '/users'): (lambda ctx: '/users?limit=50', None, False),
+    ('GET', '/user'): (lambda ctx: '/user', None, False),
+    ('GET', '/movers'): (lambda ctx: '/movers', None, False),
+    ('GET', '/mover'): (lambda ctx: '/mover', None, False),
+    ('GET', '/movers/<int:mover_id>'): (lambda ctx: f'/movers/{ctx.pick("movers")}', None, False),
+    ('GET', '/movers/matches'): (lambda ctx: '/movers/matches?limit=20', None, False),
+    ('GET', '/inventory'): (lambda ctx: '/inventory', None, False),
+    ('GET', '/inventory/search'): (lambda ctx: f'/inventory/search?q={ctx.prefix()}', None, False),
+    ('GET', '/inventory/<int:inventory_id>'): (lambda ctx: f'/inventory/{ctx.pick("inventory")}', None, False),
+    ('GET', '/inventory/user'): (lambda ctx: '/inventory/user', None, False),
+    ('GET', '/properties'): (lambda ctx: '/properties', None, False),
+    ('GET', '/moves'): (lambda ctx: '/moves?limit=50', None, False),
+    ('GET', '/move'): (lambda ctx: '/move?limit=50', None, False),
+    ('GET', '/move/<int:move_id>'): (lambda ctx: f'/move/{ctx.pick("own_moves")}', None, False),
+    ('GET', '/moves/<int:move_id>'): (lambda ctx: f'/moves/{ctx.pick("own_moves")}', None, False),
+    ('GET', '/moves/<int:move_id>/detail'): (lambda ctx: f'/moves/{ctx.pick("moves")}/detail', None, False),
+    ('GET', '/moves/<int:move_id>/quotes'): (lambda ctx: f'/moves/{ctx.pick("moves")}/quotes', None, False),
+    ('GET', '/quote'): (lambda ctx: '/quote', None, False),
+    ('POST', '/moves'): (lambda ctx: '/moves', lambda ctx: {
+        "from_address": "Westlands Nairobi", "to_address": "Karen Nairobi",
+        "move_date": "2030-06-01", "move_time": "10:00:00", "distance": 12.5,
+    }, True),
+    ('PATCH', '/moves/<int:move_id>'): (lambda ctx: f'/moves/{ctx.pick("own_moves")}',
+                                        lambda ctx: {"move_time": "11:30:00"}, True),
+    ('POST', '/inventory/user/batch'): (lambda ctx: '/inventory/user/batch', lambda ctx: {"operations": [
+        {"op": "add", "inventory_id": ctx.pick("inventory"), "quantity": 1} for _ in range(10)
+    ]}, True),
+    ('POST', '/quote'): (lambda ctx: '/quote', lambda ctx: {
+        "move_id": ctx.pick("moves"), "quote_amount": 500.0, "details": "Load test",
+    }, True),
+}
+
+SKIPPED = {
+    ('POST', '/auth/signup'): "sends email",
+    ('POST', '/auth/resend-otp'): "sends email",
+    ('POST', '/auth/forgot-password'): "sends email",
+    ('POST', '/auth/reset-password'): "needs a reset token",
+    ('POST', '/auth/verify-otp'): "needs an OTP",
+    ('POST', '/auth/logout'): "revokes the test session",
+    ('GET', '/auth/login/google'): "external OAuth",
+    ('GET', '/auth/authorize/google'): "external OAuth",
+}
+
+
+class AppClient:
+    # In-process: one Flask test client per thread.
+    def __init__(self, app, headers):
+        self.client = app.test_client()
+        self.headers = headers
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body, headers=self.headers)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.get_data()
+
+    def set_token(self, token):
+        self.client.set_cookie('localhost', 'access_token', token)
+
+
+class HttpClient:
+    def __init__(self, base_url, headers):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+
+    def request(self, method, path, body=None):
+        response = self.session.request(method, self.base_url + path, json=body)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.content
+
+    def set_token(self, token):
+        self.session.cookies.set('access_token', token)
+
+
+class Context:
+    """Login credentials and ids discovered through the API, for path params."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self.ids = {}
+        self.prefixes = ['so', 'ta', 'bed', 'wa', 'de', 'fr', 'co', 'mi', 'la', 'gl']
+
+    def pick(self, kind):
+        ids = self.ids.get(kind)
+        return random.choice(ids) if ids else 1
+
+    def prefix(self):
+        return random.choice(self.prefixes)
+
+    def discover(self, client):
+        def ids(path, key):
+            status, _, body = client.request('GET', path)
+            return [row["id"] for row in json.loads(body).get(key, [])] if status == 200 else []
+        self.ids["moves"] = ids('/moves?limit=200', 'moves')
+        self.ids["own_moves"] = ids('/move?limit=200', 'moves')
+        self.ids["inventory"] = ids('/inventory', 'inventory')[:1000]
+        self.ids["movers"] = ids('/movers', 'movers')
+
+
+def login(client, credentials):
+    status, _, body = client.request('POST', '/auth/login', credentials)
+    if status != 200:
+        raise SystemExit(f"Login failed ({status}): {body[:200]!r}. Seed with: python seed.py --bulk")
+    client.set_token(json.loads(body)["access_token"])
+
+
+def routes(app):
+    # Every (method, rule) registered on the app, in registration order.
+    seen = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            seen.append((method, rule.rule))
+    return seen
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def run_phase(clients, ctx, method, rule, total):
+    path_for, body_for, _ = SCENARIOS[(method, rule)]
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    per_client = [total // len(clients) + (1 if i < total % len(clients) else 0) for i in range(len(clients))]
+
+    def worker(client, count):
+        local_latency, local_queries, local_errors = [], [], 0
+        for _ in range(count):
+            path = path_for(ctx)
+            body = body_for(ctx) if body_for else None
+            start = time.perf_counter()
+            status, timing, _ = client.request(method, path, body)
+            local_latency.append(time.perf_counter() - start)
+            match = SERVER_TIMING_QUERIES.search(timing)
+            if match:
+                local_queries.append(int(match.group(1)))
+            if status >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latency)
+            queries.extend(local_queries)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(c, n)) for c, n in zip(clients, per_client)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "queries": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'route':<44} {'p95 base':>9} {'p95 now':>9} {'change':>8} {'q base':>7} {'q now':>6}")
+    for route, now in results.items():
+        before = baseline.get(route)
+        if before is None:
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        flag = ''
+        if change > tolerance:
+            flag = '  SLOWER'
+            regressions.append(route)
+        if now["queries"] is not None and before["queries"] is not None and now["queries"] > before["queries"]:
+            flag += '  MORE QUERIES'
+            if route not in regressions:
+                regressions.append(route)
+        print(f"{route:<44} {before['p95_ms']:>9.2f} {now['p95_ms']:>9.2f} {change:>+7.0%} "
+              f"{before['queries'] if before['queries'] is not None else '-':>7} "
+              f"{now['queries'] if now['queries'] is not None else '-':>6}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help="target a running server instead of the in-process app")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help="requests per route")
+    parser.add_argument('--writes', action='store_true', help="also run scenarios that modify data")
+    parser.add_argument('--only', nargs='+', help="route rules to run, e.g. /moves /inventory/search")
+    parser.add_argument('--email', default='user1@loadtest.example')
+    parser.add_argument('--password', default='loadtest-password')
+    parser.add_argument('--save-baseline')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p95 slowdown, as a fraction")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    from app import create_app
+    metrics_token = os.getenv('METRICS_TOKEN') or 'loadtest'
+    app = create_app({'EMAIL_WORKER_ENABLED': False, 'RATELIMIT_ENABLED': False, 'METRICS_TOKEN': metrics_token})
+    headers = {'Authorization': f'Bearer {metrics_token}'}
+    if args.url:
+        clients = [HttpClient(args.url, headers) for _ in range(args.concurrency)]
+    else:
+        clients = [AppClient(app, headers) for _ in range(args.concurrency)]
+
+    ctx = Context({"email": args.email, "password": args.password})
+    for client in clients:
+        login(client, ctx.credentials)
+    ctx.discover(clients[0])
+
+    results, skipped = {}, []
+    print(f"{'route':<44} {'reqs':>6} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'q/req':>6}")
+    for method, rule in routes(app):
+        key = f"{method} {rule}"
+        if args.only and rule not in args.only:
+            continue
+        if (method, rule) in SKIPPED:
+            skipped.append(f"{key}: {SKIPPED[(method, rule)]}")
+            continue
+        scenario = SCENARIOS.get((method, rule))
+        if scenario is None:
+            skipped.append(f"{key}: no scenario")
+            continue
+        if scenario[2] and not args.writes:
+            skipped.append(f"{key}: write (use --writes)")
+            continue
+        stats = results[key] = run_phase(clients, ctx, method, rule, args.requests)
+        print(f"{key:<44} {stats['requests']:>6} {stats['errors']:>5} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['rps']:>8.1f} "
+              f"{stats['queries'] if stats['queries'] is not None else '-':>6}")
+
+    if skipped:
+        print("\nNot run:\n  " + "\n  ".join(skipped))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} route(s) regressed: " + ", ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
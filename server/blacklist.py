@@ -1,2 +1,84 @@
+import threading
+import time
+import kvstore
 
-BLACKLIST = set()
+
+class RevocationStore:
+    """Revoked token JTIs, shared between workers through a Redis-compatible store.
+
+    Every revocation is appended to a log in the store: a counter, plus one
+    entry per position that expires with its token, so the log never
+    outgrows the set of live tokens. Each process keeps every revoked JTI it
+    has read in a local dict and catches up with the log at most every
+    `sync_interval` seconds, with a single GET when nothing changed. A check
+    is a dict lookup either way, and a logout on another worker is seen here
+    within `sync_interval` seconds.
+    """
+
+    def __init__(self, client=None, prefix='revoked:', sync_interval=1.0, batch_size=1000):
+        self.client = client or kvstore.LocalRedis()
+        self.prefix = prefix
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def init_app(self, app):
+        self.client = kvstore.connect(app.config.get('REVOCATION_STORE_URL'))
+        self.sync_interval = app.config.get('REVOCATION_CACHE_SECONDS', self.sync_interval)
+        self._reset()
+
+    def _reset(self):
+        self._revoked = {}
+        self._position = 0
+        self._retry = ()
+        self._synced_at = 0.0
+        self._pruned_at = time.monotonic()
+
+    def add(self, jti, expires_at=None, default_ttl=86400):
+        now = time.time()
+        ttl = int(expires_at - now) + 1 if expires_at else default_ttl
+        if ttl <= 0:
+            return
+        position = self.client.incr(self.prefix + 'position')
+        self.client.set(f"{self.prefix}log:{position}", f"{jti} {now + ttl}", ex=ttl)
+        with self._lock:
+            self._revoked[jti] = now + ttl
+
+    def sync(self):
+        # While one thread reads the log, the others go on with what is known.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            last = int(self.client.get(self.prefix + 'position') or 0)
+            positions = list(self._retry) + list(range(self._position + 1, last + 1))
+            missing = []
+            for start in range(0, len(positions), self.batch_size):
+                batch = positions[start:start + self.batch_size]
+                values = self.client.mget([f"{self.prefix}log:{position}" for position in batch])
+                for position, value in zip(batch, values):
+                    if value is not None:
+                        jti, expires_at = value.decode('utf-8').split(' ')
+                        self._revoked[jti] = float(expires_at)
+                    elif position > self._position and position > last - self.batch_size:
+                        # Expired, or taken by add() on another worker that
+                        # hasn't written the entry yet: look once more next time.
+                        missing.append(position)
+            self._position = max(self._position, last)
+            self._retry = missing
+            if time.monotonic() - self._pruned_at >= 60:
+                now = time.time()
+                self._revoked = {jti: until for jti, until in self._revoked.items() if until > now}
+                self._pruned_at = time.monotonic()
+            self._synced_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def __contains__(self, jti):
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        revoked_until = self._revoked.get(jti)
+        return revoked_until is not None and revoked_until > time.time()
+
+
+BLACKLIST = RevocationStore()
@@ -0,0 +1,156 @@
+import hashlib
+import threading
+import time
+from flask import Response, request
+from json_provider import dumps
+from compression import compressor
+from database import primary
+import kvstore
+
+
+class ResponseCache:
+    """Read-through cache of encoded JSON bodies for reference data.
+
+    Two tiers: a per-process dict with a short TTL, and an optional shared
+    Redis-compatible store with a longer one. Hits return the stored bytes
+    as-is, skipping both the query and serialization. invalidate() clears
+    both tiers. Other workers can serve their local copy for at most
+    `local_ttl` seconds after that.
+
+    Each key has a generation that invalidate() bumps. A fill is stored
+    under the generation it started in, so a fill that read the rows before
+    a write committed can't be served once that write has invalidated it.
+    """
+
+    def __init__(self, ttl=300, local_ttl=10, prefix='cache:'):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.prefix = prefix
+        self.shared = None
+        self._local = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._etags = {}
+        self._variants = {}
+
+    def init_app(self, app):
+        self.ttl = app.config.get('CACHE_TTL', self.ttl)
+        self.local_ttl = app.config.get('CACHE_LOCAL_TTL', self.local_ttl)
+        url = app.config.get('CACHE_URL')
+        self.shared = kvstore.connect(url) if url else None
+        self._local.clear()
+
+    def _count(self, key, outcome):
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters.setdefault(key, {"hit_local": 0, "hit_shared": 0, "miss": 0})
+        counters[outcome] += 1
+
+    def _shared_key(self, key, generation):
+        return f"{self.prefix}{key}:{generation}"
+
+    def generation(self, key):
+        # (local, shared) generation; the shared one costs a round trip.
+        shared = 0
+        if self.shared is not None:
+            shared = int(self.shared.get(f"{self.prefix}{key}:generation") or 0)
+        return self._generations.get(key, 0), shared
+
+    def get(self, key):
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > time.time():
+            self._count(key, "hit_local")
+            return entry[1]
+
+        if self.shared is not None:
+            generation = self.generation(key)
+            body = self.shared.get(self._shared_key(key, generation[1]))
+            if body is not None:
+                self._count(key, "hit_shared")
+                self._set_local(key, body, generation[0])
+                return body
+
+        self._count(key, "miss")
+        return None
+
+    def _set_local(self, key, body, generation):
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._local[key] = (time.time() + self.local_ttl, body)
+
+    def set(self, key, body, generation=None):
+        # `generation` as read before the body was built; a stale one means
+        # the body may predate an invalidate() and is not kept locally.
+        local, shared = generation or self.generation(key)
+        self._set_local(key, body, local)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key, shared), body, ex=self.ttl)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+        if self.shared is not None:
+            # Readers move on to the new generation; old bodies just expire.
+            for key in keys:
+                self.shared.incr(f"{self.prefix}{key}:generation")
+
+    def etag(self, key, body):
+        # Hash of the cached bytes, computed once per local fill.
+        tags = self._etags
+        entry = tags.get(key)
+        if entry is None or entry[0] is not body:
+            entry = tags[key] = (body, hashlib.sha1(body).hexdigest())
+        return entry[1]
+
+    def encoded(self, key, body, encoding):
+        # Compressed variants of the cached bytes, also made once per local
+        # fill and then served without compressing again.
+        entry = self._variants.get(key)
+        if entry is None or entry[0] is not body:
+            entry = self._variants[key] = (body, {})
+        data = entry[1].get(encoding)
+        if data is None:
+            data = entry[1][encoding] = compressor.compress(body, encoding)
+        else:
+            compressor.record(encoding, len(body), len(data), 0.0)
+        return data
+
+    def cached_json(self, key, producer):
+        # `producer` builds the response dict; it only runs on a miss, and
+        # on the primary: right after invalidate(), a lagging replica could
+        # still return the old rows, which would then be cached again.
+        body = self.get(key)
+        if body is None:
+            # Read before the query: if a write invalidates the key meanwhile,
+            # this body goes under the old generation, which nobody reads.
+            generation = self.generation(key)
+            with primary():
+                body = dumps(producer())
+            self.set(key, body, generation)
+        response = Response(body, status=200, mimetype='application/json')
+        # Cached bodies carry their own ETag, so a matching If-None-Match is
+        # answered with 304 without touching the database.
+        response.set_etag(self.etag(key, body), weak=True)
+        response = response.make_conditional(request)
+        if response.status_code == 200 and len(body) >= compressor.min_size:
+            response.vary.add('Accept-Encoding')
+            encoding = compressor.negotiate()
+            if encoding is not None:
+                response.set_data(self.encoded(key, body, encoding))
+                response.headers['Content-Encoding'] = encoding
+        return response
+
+    def stats(self):
+        return {key: dict(counters) for key, counters in self._counters.items()}
+
+
+cache = ResponseCache()
+
+# Keys for the cached reference data, shared by readers and the write paths
+# that invalidate them.
+PROPERTIES_KEY = 'properties'
+INVENTORY_CATALOG_KEY = 'inventory:all'
+MOVERS_KEY = 'movers'
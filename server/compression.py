@@ -0,0 +1,131 @@
+import threading
+import time
+import zlib
+from functools import partial
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml',
+}
+
+
+class Compressor:
+    """Content-Encoding negotiation for responses: brotli (if installed) or gzip.
+
+    Bodies under `min_size` bytes go out as they are; compressing them costs
+    more CPU than it saves on the wire. Streamed responses are compressed
+    chunk by chunk and flushed after each one, so the client still receives
+    rows as they are produced. Responses that already carry a Content-Encoding
+    (e.g. pre-compressed cache bodies) are left alone.
+    """
+
+    def __init__(self, level=6, brotli_quality=4, min_size=1024, algorithms=('br', 'gzip')):
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.algorithms = algorithms
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def init_app(self, app):
+        self.level = app.config.get('COMPRESS_LEVEL', self.level)
+        self.brotli_quality = app.config.get('COMPRESS_BR_QUALITY', self.brotli_quality)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        algorithms = app.config.get('COMPRESS_ALGORITHMS', self.algorithms)
+        self.algorithms = tuple(a for a in algorithms if a == 'gzip' or (a == 'br' and brotli is not None))
+        if not app.config.get('COMPRESS_ENABLED', True):
+            self.algorithms = ()
+        if self.algorithms:
+            app.after_request(self.compress_response)
+
+    def negotiate(self):
+        # Highest q-value the client accepts; on a tie, our order (br first).
+        # None when compression is off or the client accepts neither.
+        return request.accept_encodings.best_match(self.algorithms) if self.algorithms else None
+
+    def compress(self, data, encoding):
+        started = time.perf_counter()
+        if encoding == 'br':
+            body = brotli.compress(data, quality=self.brotli_quality)
+        else:
+            body = gzip_compress(data, self.level)
+        self.record(encoding, len(data), len(body), time.perf_counter() - started)
+        return body
+
+    def compress_stream(self, chunks, encoding):
+        if encoding == 'br':
+            encoder = brotli.Compressor(quality=self.brotli_quality)
+            process, flush, finish = encoder.process, encoder.flush, encoder.finish
+        else:
+            encoder = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            process = encoder.compress
+            flush = partial(encoder.flush, zlib.Z_SYNC_FLUSH)
+            finish = encoder.flush
+        for chunk in chunks:
+            if not chunk:
+                continue
+            started = time.perf_counter()
+            out = process(chunk) + flush()
+            self.record(encoding, len(chunk), len(out), time.perf_counter() - started, responses=0)
+            yield out
+        out = finish()
+        self.record(encoding, 0, len(out), 0.0)
+        yield out
+
+    def compress_response(self, response):
+        if not self._compressible(response):
+            return response
+        streamed = response.is_streamed
+        if not streamed and (response.content_length or 0) < self.min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        if streamed:
+            response.response = self.compress_stream(response.iter_encoded(), encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(self.compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compressible(response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304) or request.method == 'HEAD':
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+    def record(self, encoding, bytes_in, bytes_out, seconds, responses=1):
+        stats = self._stats.get(encoding)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0,
+                                                          "seconds": 0.0})
+        stats["responses"] += responses
+        stats["bytes_in"] += bytes_in
+        stats["bytes_out"] += bytes_out
+        stats["seconds"] += seconds
+
+    def stats(self):
+        return {encoding: dict(stats) for encoding, stats in self._stats.items()}
+
+
+def gzip_compress(data, level):
+    # gzip.compress() also writes the current time into the header; mtime 0
+    # keeps equal bodies byte-identical, which suits cached variants.
+    encoder = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return encoder.compress(data) + encoder.flush()
+
+
+compressor = Compressor()
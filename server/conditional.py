@@ -0,0 +1,82 @@
+import datetime
+import hashlib
+from functools import wraps
+from flask import request, current_app, Response
+from sqlalchemy import Select, func
+from models import db
+
+
+def _validators(model, criteria):
+    # The id sum catches a row swapped for another in a fixed-size page,
+    # which leaves both max(updated_at) and count() unchanged.
+    if isinstance(criteria, Select):
+        rows = criteria.subquery()
+        stmt = db.select(func.max(rows.c.updated_at), func.count(), func.sum(rows.c.id))
+    else:
+        stmt = db.select(func.max(model.updated_at), func.count(), func.sum(model.id)).select_from(model)
+        if criteria:
+            stmt = stmt.where(*criteria)
+    return db.session.execute(stmt).one()
+
+
+def _not_modified(tag, last_modified, count):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(tag)
+    # A newer timestamp can't reveal a deleted row, so If-Modified-Since is
+    # only trusted when the response covers a single row.
+    since = request.if_modified_since
+    if since is not None and last_modified is not None and count <= 1:
+        return last_modified.replace(microsecond=0, tzinfo=datetime.timezone.utc) <= since
+    return False
+
+
+def _attach(rv, tag, last_modified):
+    if isinstance(rv, Response):
+        if rv.status_code == 200 and not rv.headers.get('ETag'):
+            rv.set_etag(tag, weak=True)
+            if last_modified is not None:
+                rv.last_modified = last_modified
+        return rv
+    if not isinstance(rv, tuple) or len(rv) < 2 or rv[1] != 200:
+        return rv
+    headers = dict(rv[2]) if len(rv) > 2 else {}
+    headers['ETag'] = f'W/"{tag}"'
+    if last_modified is not None:
+        headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+    return rv[0], rv[1], headers
+
+
+def conditional(model, scope=None):
+    """ETag / Last-Modified validation for a GET resource method.
+
+    The validator is max(updated_at), count() and sum(id) over the rows the
+    response covers, so checking it costs one aggregate query and no
+    serialization. `scope(**view_args)` returns the where-clauses that select
+    those rows, or, for a paginated listing, a statement selecting the `id`
+    and `updated_at` of exactly the page; return None to skip validation for
+    this request. The query string and Accept header are part of the tag,
+    since they change the body.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            criteria = scope(**kwargs) if scope is not None else ()
+            if criteria is None:
+                return current_app.ensure_sync(fn)(*args, **kwargs)
+
+            last_modified, count, checksum = _validators(model, criteria)
+            tag = hashlib.sha1(
+                f"{last_modified}|{count}|{checksum}|{request.full_path}|{request.headers.get('Accept', '')}".encode('utf-8')
+            ).hexdigest()
+
+            if _not_modified(tag, last_modified, count):
+                response = Response(status=304)
+                response.set_etag(tag, weak=True)
+                if last_modified is not None:
+                    response.last_modified = last_modified
+                return response
+
+            return _attach(current_app.ensure_sync(fn)(*args, **kwargs), tag, last_modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,107 @@
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_PREFIX = 'replica_'
+STICKY_COOKIE = 'db_primary_until'
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def engine_options(database_uri, pool_size=None, max_overflow=None, pool_timeout=None,
+                   pool_recycle=None, pool_pre_ping=True, statement_timeout_ms=None, poolclass=None):
+    # SQLite gets Flask-SQLAlchemy's driver defaults; its pools don't take
+    # queue pool arguments.
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    options = {'pool_pre_ping': pool_pre_ping}
+    if poolclass is not None:
+        options['poolclass'] = poolclass
+    for key, value in (('pool_size', pool_size), ('max_overflow', max_overflow),
+                       ('pool_timeout', pool_timeout), ('pool_recycle', pool_recycle)):
+        if value is not None:
+            options[key] = value
+    if statement_timeout_ms and database_uri.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout_ms)}'}
+    return options
+
+
+def replica_binds(urls):
+    return {f'{REPLICA_PREFIX}{i}': url for i, url in enumerate(urls)}
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica inside @read_replica handlers.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary,
+    as does everything outside a @read_replica scope.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get('db_replica')
+            if replica is not None and not getattr(clause, 'is_dml', False):
+                engine = self._db.engines.get(replica)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _sticky():
+    # Clients that wrote recently read from the primary until the cookie
+    # expires, so they always see their own changes.
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_replica(fn):
+    """Run a read-only resource method against a randomly chosen replica."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        replicas = current_app.extensions.get('db_replicas')
+        if not replicas or g.get('db_replica') is not None or _sticky():
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        g.db_replica = random.choice(replicas)
+        try:
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        finally:
+            g.db_replica = None
+    return wrapper
+
+
+@contextmanager
+def primary():
+    """Reads inside the block go to the primary, even in a @read_replica handler.
+
+    For results that outlive the request, such as shared cache fills: a
+    lagging replica would store stale rows for the cache's whole TTL.
+    """
+    replica = g.get('db_replica') if has_request_context() else None
+    if replica is None:
+        yield
+        return
+    g.db_replica = None
+    try:
+        yield
+    finally:
+        g.db_replica = replica
+
+
+def _mark_sticky(response):
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        seconds = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        response.set_cookie(STICKY_COOKIE, str(int(time.time() + seconds) + 1),
+                            max_age=int(seconds) + 1, httponly=True, samesite='Lax')
+    return response
+
+
+def init_replicas(app):
+    replicas = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_PREFIX))
+    app.extensions['db_replicas'] = replicas
+    if replicas:
+        app.after_request(_mark_sticky)
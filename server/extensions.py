@@ -1,5 +0,0 @@
-from flask_bcrypt import Bcrypt
-from authlib.integrations.flask_client import OAuth
-
-bcrypt = Bcrypt()
-oauth = OAuth()
@@ -0,0 +1,242 @@
+import hashlib
+import re
+import threading
+import time
+import numpy as np
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, GeocodedAddress, Move
+from pricing import RateCard, estimate_prices
+
+EARTH_RADIUS_KM = 6371.0088
+LOOKUP_CHUNK = 500
+
+
+def normalize_address(address):
+    # Case, punctuation and spacing differences map to the same cache key:
+    # "Westlands,  Nairobi." and "westlands nairobi" are one address.
+    return ' '.join(re.findall(r'[a-z0-9]+', (address or '').lower()))[:255]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments broadcast like NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class NominatimProvider:
+    # Nominatim has no batch endpoint and its usage policy allows one request
+    # per second, so lookups are spaced out by `min_interval`, across all
+    # threads sharing the provider. requests is only imported when this
+    # provider is configured.
+    def __init__(self, url='https://nominatim.openstreetmap.org', user_agent='moving-app',
+                 country_codes=None, timeout=3.0, min_interval=1.0):
+        import requests
+        self.url = url.rstrip('/')
+        self.user_agent = user_agent
+        self.country_codes = country_codes
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def geocode_many(self, addresses):
+        # Returns {address: (lat, lon) or None}. Addresses that failed with a
+        # transient error are left out so they are retried later, not cached.
+        import requests
+        results = {}
+        for address in addresses:
+            params = {'q': address, 'format': 'jsonv2', 'limit': 1}
+            if self.country_codes:
+                params['countrycodes'] = self.country_codes
+            with self._lock:
+                wait = self._last_request + self.min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    response = self._session.get(f"{self.url}/search", params=params, timeout=self.timeout,
+                                                 headers={'User-Agent': self.user_agent})
+                    response.raise_for_status()
+                    matches = response.json()
+                except (requests.RequestException, ValueError):
+                    continue
+                finally:
+                    self._last_request = time.monotonic()
+            results[address] = (float(matches[0]['lat']), float(matches[0]['lon'])) if matches else None
+        return results
+
+
+class FakeProvider:
+    # Deterministic offline provider for tests and local development. Unknown
+    # addresses land at a stable point in the Nairobi area.
+    def __init__(self, known=None):
+        self.known = {normalize_address(k): v for k, v in (known or {}).items()}
+        self.calls = []
+
+    def geocode_many(self, addresses):
+        self.calls.append(list(addresses))
+        results = {}
+        for address in addresses:
+            if address in self.known:
+                results[address] = self.known[address]
+                continue
+            digest = hashlib.sha1(address.encode('utf-8')).digest()
+            results[address] = (
+                round(-1.45 + digest[0] / 255 * 0.3, 6),
+                round(36.65 + digest[1] / 255 * 0.45, 6),
+            )
+        return results
+
+
+def make_provider(config):
+    name = config.get('GEOCODER', 'none')
+    if name == 'nominatim':
+        return NominatimProvider(
+            url=config.get('GEOCODER_URL') or 'https://nominatim.openstreetmap.org',
+            user_agent=config.get('GEOCODER_USER_AGENT') or 'moving-app',
+            country_codes=config.get('GEOCODER_COUNTRY_CODES'),
+        )
+    if name == 'fake':
+        return FakeProvider()
+    return None
+
+
+class Geocoder:
+    """Address to coordinate lookups backed by the geocoded_addresses table.
+
+    Each normalized address reaches the provider at most once. Results,
+    including addresses the provider could not place, are stored and then
+    served from the table. With no provider configured, only stored
+    results are used.
+    """
+
+    def __init__(self, provider=None):
+        self.provider = provider
+
+    def init_app(self, app):
+        self.provider = make_provider(app.config)
+
+    def _lookup(self, keys):
+        found = {}
+        keys = sorted(keys)
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            rows = db.session.execute(
+                db.select(GeocodedAddress.normalized, GeocodedAddress.latitude, GeocodedAddress.longitude)
+                .where(GeocodedAddress.normalized.in_(keys[start:start + LOOKUP_CHUNK]))
+            ).all()
+            for normalized, lat, lon in rows:
+                found[normalized] = (lat, lon) if lat is not None else None
+        return found
+
+    def _store(self, results, provider_name):
+        rows = [
+            {"normalized": key, "latitude": coords[0] if coords else None,
+             "longitude": coords[1] if coords else None, "provider": provider_name}
+            for key, coords in results.items()
+        ]
+        # Another worker may have stored the same address in the meantime.
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        db.session.execute(insert(GeocodedAddress).on_conflict_do_nothing(index_elements=['normalized']), rows)
+
+    def resolve(self, addresses, fetch=True):
+        """{address: (lat, lon) or None} for each given address.
+
+        Cached addresses are read in one query. The rest go to the provider
+        in one batch, unless `fetch` is False. New results join the caller's
+        transaction.
+        """
+        keys = {address: normalize_address(address) for address in addresses if address}
+        found = self._lookup(set(keys.values()) - {''})
+        missing = sorted(set(keys.values()) - found.keys() - {''})
+        if missing and fetch and self.provider is not None:
+            results = self.provider.geocode_many(missing)
+            if results:
+                self._store(results, type(self.provider).__name__)
+                found.update(results)
+        return {address: found.get(key) for address, key in keys.items()}
+
+    def routes(self, pairs, fetch=True):
+        # [(from_address, to_address)] -> [(origin, destination, km or None)]
+        coords = self.resolve({address for pair in pairs for address in pair}, fetch=fetch)
+        origins = [coords.get(a) for a, _ in pairs]
+        destinations = [coords.get(b) for _, b in pairs]
+        known = np.array([o is not None and d is not None for o, d in zip(origins, destinations)], dtype=bool)
+        distances = np.full(len(pairs), np.nan)
+        if known.any():
+            start = np.array([o for o, k in zip(origins, known) if k])
+            end = np.array([d for d, k in zip(destinations, known) if k])
+            distances[known] = np.round(haversine_km(start[:, 0], start[:, 1], end[:, 0], end[:, 1]), 2)
+        return [
+            (o, d, None if np.isnan(km) else float(km))
+            for o, d, km in zip(origins, destinations, distances.tolist())
+        ]
+
+
+geocoder = Geocoder()
+
+
+def geocode_moves(moves, fallback_distances=None, fetch=True):
+    """Set coordinates and server-side distance on Move instances.
+
+    When either end can't be placed, the distance falls back to the
+    matching entry of `fallback_distances` (usually the client's value) or
+    is left unchanged. Request handlers pass fetch=False: only stored
+    results are used, and backfill_moves() places the rest later.
+    """
+    routes = geocoder.routes([(move.from_address, move.to_address) for move in moves], fetch=fetch)
+    fallback_distances = fallback_distances or [None] * len(moves)
+    for move, (origin, destination, km), fallback in zip(moves, routes, fallback_distances):
+        move.from_lat, move.from_lon = origin or (None, None)
+        move.to_lat, move.to_lon = destination or (None, None)
+        if km is not None:
+            move.distance = km
+        elif fallback is not None:
+            move.distance = fallback
+
+
+def backfill_moves(batch_size=500):
+    # Geocodes moves saved without coordinates (stored before coordinates
+    # existed, or with addresses not yet looked up), re-estimates their prices
+    # from the new distances and refreshes their mover candidates.
+    from matching import refresh_move_candidates
+    rate_card = RateCard.from_config(current_app.config)
+    last_id = 0
+    located = 0
+    while True:
+        moves = db.session.execute(
+            db.select(Move).where(Move.from_lat.is_(None), Move.id > last_id).order_by(Move.id).limit(batch_size)
+        ).scalars().all()
+        if not moves:
+            break
+        geocode_moves(moves)
+        prices = estimate_prices(rate_card, [(m.id, m.user_id, m.distance) for m in moves])
+        for move in moves:
+            move.estimated_price = prices[move.id]
+        db.session.commit()
+        placed = [m.id for m in moves if m.from_lat is not None and m.to_lat is not None]
+        if placed:
+            refresh_move_candidates(placed)
+        located += len(placed)
+        last_id = moves[-1].id
+    return located
+
+
+if __name__ == '__main__':
+    # One pass, or with --interval a background job that keeps placing new
+    # moves. Run a single one: the provider's rate limit is per process.
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interval', type=float, help="repeat every N seconds")
+    args = parser.parse_args()
+    with create_app().app_context():
+        while True:
+            print(f"Located {backfill_moves()} moves", flush=True)
+            if not args.interval:
+                break
+            db.session.remove()
+            time.sleep(args.interval)
@@ -0,0 +1,39 @@
+"""gunicorn settings, read automatically when started from this directory:
+
+    gunicorn                       # 'app:create_app()' on $PORT
+    gunicorn -w 8 --threads 16     # command line options still win
+
+With PRELOAD_APP=1 (the default) the master builds the app and runs
+app.warm_up() once, then forks: workers start with everything imported and
+configured, and share those pages copy-on-write. Anything that must not
+cross a fork (database connections) is reset in post_fork.
+
+This serves the app over WSGI, with every handler on the synchronous pool.
+For the ASGI entry point use uvicorn instead (see asgi.py).
+"""
+import os
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = os.getenv('PRELOAD_APP', '1') == '1'
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded, before any worker is forked.
+    if server.cfg.preload_app:
+        from app import warm_up
+        warm_up(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from models import db
+    # Pooled connections opened in the master must not be shared with the
+    # children; close=False leaves them to the master instead of closing
+    # sockets it still owns.
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# These run inside the pool's worker processes. They return how long the job
+# sat in the queue so the parent can report hash queue wait time. bcrypt is
+# imported there too; with a pool, the web workers never load it.
+def _hash_password(password, rounds, submitted_at):
+    import bcrypt
+    waited = time.time() - submitted_at
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+    return hashed.decode('utf-8'), waited
+
+
+def _check_password(hashed, password, submitted_at):
+    import bcrypt
+    waited = time.time() - submitted_at
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')), waited
+
+
+class HashingPool:
+    """bcrypt on a bounded process pool instead of the request thread.
+
+    At most `max_queue` hashes may be queued or running at once. Beyond that,
+    callers get HashingBusy straight away (the resources turn it into a 503)
+    rather than piling up behind a login storm. A job that outlives
+    HASH_TIMEOUT, or whose worker process died, raises HashingBusy too; its
+    slot is only freed once the job is really done. With HASH_WORKERS=0
+    hashing runs inline, which is handy for tests and one-off scripts.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.max_workers = os.cpu_count() or 1
+        self.max_queue = self.max_workers * 4
+        self.timeout = 10
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._stats = {"completed": 0, "rejected": 0, "timed_out": 0, "failed": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.max_workers = app.config.get('HASH_WORKERS', os.cpu_count() or 1)
+        self.max_queue = app.config.get('HASH_QUEUE_LIMIT', max(self.max_workers, 1) * 4)
+        self.timeout = app.config.get('HASH_TIMEOUT', 10)
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self.shutdown()
+
+    def _get_executor(self):
+        # Created on first use so that prefork servers fork before any pool
+        # processes exist.
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _discard(self, executor):
+        # A pool whose worker died is broken for good; the next job starts a
+        # new one.
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._stats["rejected"] += 1
+            raise HashingBusy("Password hashing queue is full")
+        if self.max_workers == 0:
+            try:
+                result, waited = fn(*args, time.time())
+            finally:
+                self._slots.release()
+            self._record(waited)
+            return result
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args, time.time())
+        except BrokenProcessPool:
+            self._slots.release()
+            self._discard(executor)
+            self._stats["failed"] += 1
+            raise HashingBusy("Password hashing pool is broken") from None
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot stays taken until the job finishes, even when the caller
+        # gives up waiting, so timed-out jobs still count against max_queue.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result, waited = future.result(self.timeout)
+        except TimeoutError:
+            self._stats["timed_out"] += 1
+            raise HashingBusy("Password hashing timed out") from None
+        except BrokenProcessPool:
+            self._discard(executor)
+            self._stats["failed"] += 1
+            raise HashingBusy("Password hashing pool is broken") from None
+        self._record(waited)
+        return result
+
+    def _record(self, waited):
+        stats = self._stats
+        stats["completed"] += 1
+        stats["wait_seconds_total"] += waited
+        if waited > stats["wait_seconds_max"]:
+            stats["wait_seconds_max"] = waited
+
+    def generate_password_hash(self, password):
+        return self._run(_hash_password, password, self.rounds)
+
+    def check_password_hash(self, hashed, password):
+        # Accounts created through Google have no password to check.
+        if not hashed:
+            return False
+        return self._run(_check_password, hashed, password)
+
+    def needs_rehash(self, hashed):
+        # bcrypt hashes look like $2b$<cost>$<salt+hash>.
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def metrics(self):
+        stats = dict(self._stats)
+        stats["queue_limit"] = self.max_queue
+        stats["workers"] = self.max_workers
+        return stats
+
+
+hashing = HashingPool()
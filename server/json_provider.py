@@ -0,0 +1,83 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    # Types neither encoder handles on its own. orjson already covers
+    # datetimes, dates, times, UUIDs and dataclasses; the stdlib needs all of them.
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        """Compact UTF-8 JSON as bytes."""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def _dumps_indented(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS | orjson.OPT_INDENT_2)
+else:
+    _encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_default).encode
+
+    def dumps(obj):
+        """Compact UTF-8 JSON as bytes."""
+        return _encode(obj).encode('utf-8')
+
+    def _dumps_indented(obj):
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_default).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed.
+
+    Responses are compact (indented only in debug mode, as with Flask's
+    default), keys keep their insertion order, and non-ASCII text is sent as
+    UTF-8 rather than \\u escapes. datetime, date and time values are written
+    as ISO 8601, so handlers can return model attributes as they are.
+    """
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent'):
+            return _dumps_indented(obj).decode('utf-8')
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = _dumps_indented(obj) if pretty else dumps(obj)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def output_json(data, code, headers=None):
+    # Flask-RESTful representation for application/json. Its built-in one
+    # calls the stdlib json.dumps directly; this goes through the app's provider.
+    response = current_app.json.response(data)
+    response.status_code = code
+    response.headers.extend(headers or {})
+    return response
@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+class LocalRedis:
+    """In-process stand-in for the small part of the Redis API the app uses.
+
+    Used when no shared store is configured (single worker, local runs and
+    tests). Values come back as bytes, like redis-py.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode('utf-8')
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._live(key) else None
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._data[key] if self._live(key) else None for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            self._data[key] = self._encode(value)
+            if ex is not None:
+                self._expires[key] = time.time() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._live(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._live(key))
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self._data[key]) + amount if self._live(key) else amount
+            self._data[key] = self._encode(value)
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._live(key):
+                return False
+            self._expires[key] = time.time() + seconds
+            return True
+
+    def ttl(self, key):
+        with self._lock:
+            if not self._live(key):
+                return -2
+            expires_at = self._expires.get(key)
+            return -1 if expires_at is None else max(0, int(expires_at - time.time()))
+
+
+def connect(url=None):
+    # redis:// and rediss:// URLs go to a real server; anything else,
+    # including no URL at all, gets a process-local LocalRedis.
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis
+        return redis.Redis.from_url(url)
+    return LocalRedis()
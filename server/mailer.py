@@ -0,0 +1,170 @@
+import datetime
+import logging
+import threading
+from models import db, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+# Resend accepts at most 100 emails per batch call.
+BATCH_SIZE = 50
+
+
+def enqueue_email(params, session=None):
+    # The message joins the caller's session (db.session unless an async
+    # session is passed) and is committed with it, so an email exists exactly
+    # when the change that triggered it does.
+    message = EmailOutbox(
+        sender=params["from"],
+        recipients=list(params["to"]),
+        subject=params["subject"],
+        html=params["html"],
+        next_attempt_at=datetime.datetime.utcnow(),
+    )
+    (session or db.session).add(message)
+    return message
+
+
+def retry_delay(attempts):
+    # 30s, 1m, 2m, 4m ... capped at an hour.
+    return datetime.timedelta(seconds=min(30 * 2 ** (attempts - 1), 3600))
+
+
+class ResendTransport:
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+
+    def send_batch(self, messages):
+        import resend
+        if self.api_key:
+            resend.api_key = self.api_key
+        resend.Batch.send([
+            {"from": m.sender, "to": m.recipients, "subject": m.subject, "html": m.html}
+            for m in messages
+        ])
+
+
+class FakeTransport:
+    """Keeps sent messages in memory; set `fail` to simulate an outage."""
+
+    def __init__(self):
+        self.sent = []
+        self.fail = False
+
+    def send_batch(self, messages):
+        if self.fail:
+            raise RuntimeError("fake transport is failing")
+        self.sent.extend(
+            {"from": m.sender, "to": m.recipients, "subject": m.subject, "html": m.html}
+            for m in messages
+        )
+
+
+def make_transport(app):
+    if app.config.get('EMAIL_TRANSPORT') == 'fake':
+        return FakeTransport()
+    return ResendTransport(app.config.get('RESEND_API_KEY'))
+
+
+class OutboxWorker:
+    def __init__(self, app, transport, batch_size=BATCH_SIZE, poll_interval=1.0, concurrency=1):
+        self.app = app
+        self.transport = transport
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        # Safe to call on every request; only the first call spawns threads.
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.concurrency):
+                thread = threading.Thread(target=self._run, name=f"outbox-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stop.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {str(e)}")
+                sent = 0
+            # Keep draining while there is a backlog, otherwise wait for more.
+            if sent < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def drain_once(self):
+        with self.app.app_context():
+            now = datetime.datetime.utcnow()
+            # SKIP LOCKED lets several workers (threads or processes) drain the
+            # table at once without picking up the same messages.
+            stmt = (
+                db.select(EmailOutbox)
+                .where(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = db.session.execute(stmt).scalars().all()
+            if not messages:
+                db.session.rollback()
+                return 0
+
+            try:
+                self.transport.send_batch(messages)
+            except Exception as e:
+                logger.error(f"Failed to send {len(messages)} outbox emails: {str(e)}")
+                for message in messages:
+                    message.attempts += 1
+                    message.last_error = str(e)
+                    if message.attempts >= MAX_ATTEMPTS:
+                        message.status = 'failed'
+                    else:
+                        message.next_attempt_at = now + retry_delay(message.attempts)
+                db.session.commit()
+                return 0
+
+            for message in messages:
+                message.attempts += 1
+                message.status = 'sent'
+                message.sent_at = now
+            db.session.commit()
+            return len(messages)
+
+
+def init_outbox(app):
+    worker = OutboxWorker(
+        app,
+        make_transport(app),
+        poll_interval=app.config.get('EMAIL_POLL_INTERVAL', 1.0),
+        concurrency=app.config.get('EMAIL_WORKER_CONCURRENCY', 1),
+    )
+    app.extensions['email_outbox'] = worker
+    if app.config.get('EMAIL_WORKER_ENABLED', True):
+        # Started on the first request rather than at import, so CLI commands
+        # such as `flask db upgrade` never poll a table that may not exist yet.
+        app.before_request(worker.start)
+    return worker
+
+
+if __name__ == '__main__':
+    # Dedicated drain process: run with EMAIL_WORKER_ENABLED=0 on the web workers.
+    from app import create_app
+    worker = create_app().extensions['email_outbox']
+    worker.start()
+    for thread in worker._threads:
+        thread.join()
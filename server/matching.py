@@ -0,0 +1,188 @@
+import datetime
+import re
+import numpy as np
+from sqlalchemy import func
+from models import db, Move, Mover, User, Booking, MoveCandidate
+from geocoding import geocoder, haversine_km
+
+# Each open move is offered to at most this many movers.
+CANDIDATES_PER_MOVE = 50
+MIN_SCORE = 0.2
+OPEN_STATUSES = ('Pending',)
+# Proximity halves roughly every PROXIMITY_KM * ln 2 kilometres.
+PROXIMITY_KM = 15.0
+WEIGHTS = {'house_type': 0.3, 'available': 0.15, 'rating': 0.25, 'free_day': 0.1, 'proximity': 0.2}
+
+
+def _tokens(address):
+    return frozenset(re.findall(r'[a-z0-9]+', (address or '').lower()))
+
+
+def _load_movers(fetch=True):
+    # Movers have no address of their own; use their company owner's location.
+    rows = db.session.execute(
+        db.select(Mover.id, Mover.house_type, Mover.availability_status, Mover.rating, func.min(User.location))
+        .outerjoin(User, User.mover_id == Mover.id)
+        .group_by(Mover.id)
+        .order_by(Mover.id)
+    ).all()
+    coords = geocoder.resolve({row[4] for row in rows if row[4]}, fetch=fetch)
+    return [tuple(row) + (coords.get(row[4]),) for row in rows]
+
+
+def _booked_days(moves):
+    # (mover_id, day) pairs already taken by a booking on any day these moves fall on.
+    days = sorted({move.move_date.date() for move in moves})
+    if not days:
+        return set()
+    start = datetime.datetime.combine(days[0], datetime.time.min)
+    end = datetime.datetime.combine(days[-1], datetime.time.min) + datetime.timedelta(days=1)
+    rows = db.session.execute(
+        db.select(Booking.mover_id, Move.move_date)
+        .join(Move, Booking.move_id == Move.id)
+        .where(Move.move_date >= start, Move.move_date < end, Booking.status != 'Cancelled')
+    ).all()
+    return {(mover_id, move_date.date()) for mover_id, move_date in rows}
+
+
+def _token_similarity(moves, movers):
+    # Share of address words the move's origin has in common with the mover's
+    # location (Jaccard similarity), as an M x K matrix in [0, 1].
+    mover_tokens = [_tokens(mover[4]) for mover in movers]
+    matrix = np.zeros((len(moves), len(movers)))
+    for i, move in enumerate(moves):
+        origin = _tokens(move.from_address)
+        if not origin:
+            continue
+        for j, tokens in enumerate(mover_tokens):
+            if tokens:
+                matrix[i, j] = len(origin & tokens) / len(origin | tokens)
+    return matrix
+
+
+def proximity_matrix(moves, movers):
+    """M x K proximity in [0, 1], decaying with distance from the mover.
+
+    Pairs where either side has no coordinates fall back to address word
+    overlap.
+    """
+    move_lat = np.array([np.nan if m.from_lat is None else m.from_lat for m in moves], dtype=np.float64)
+    move_lon = np.array([np.nan if m.from_lon is None else m.from_lon for m in moves], dtype=np.float64)
+    mover_lat = np.array([mover[5][0] if mover[5] else np.nan for mover in movers], dtype=np.float64)
+    mover_lon = np.array([mover[5][1] if mover[5] else np.nan for mover in movers], dtype=np.float64)
+
+    km = haversine_km(move_lat[:, None], move_lon[:, None], mover_lat[None, :], mover_lon[None, :])
+    located = ~np.isnan(km)
+    matrix = np.exp(-np.where(located, km, 0.0) / PROXIMITY_KM)
+    if located.all():
+        return matrix
+    return np.where(located, matrix, _token_similarity(moves, movers))
+
+
+def score_matrix(moves, movers, booked):
+    """M x K match scores in [0, 1] for M moves against K movers."""
+    mover_ids = np.array([mover[0] for mover in movers])
+    mover_house = np.array([mover[1] or 'None' for mover in movers], dtype=object)
+    status = np.array([mover[2] or 'Available' for mover in movers], dtype=object)
+    rating = np.clip(np.array([mover[3] or 0.0 for mover in movers], dtype=np.float64) / 5.0, 0.0, 1.0)
+    move_house = np.array([move.house_type or 'None' for move in moves], dtype=object)
+
+    # Exact house type match scores 1. If either side hasn't set one ('None'),
+    # it scores half.
+    house = (move_house[:, None] == mover_house[None, :]).astype(np.float64)
+    unknown = (move_house[:, None] == 'None') | (mover_house[None, :] == 'None')
+    house = np.where(unknown, 0.5, house)
+
+    busy = np.array([
+        [(mover_id, move.move_date.date()) in booked for mover_id in mover_ids.tolist()]
+        for move in moves
+    ], dtype=np.float64).reshape(len(moves), len(movers))
+
+    scores = (
+        WEIGHTS['house_type'] * house
+        + WEIGHTS['available'] * (status == 'Available')[None, :]
+        + WEIGHTS['rating'] * rating[None, :]
+        + WEIGHTS['free_day'] * (1.0 - busy)
+        + WEIGHTS['proximity'] * proximity_matrix(moves, movers)
+    )
+    # Movers who have marked themselves unavailable get no new work.
+    return np.where((status == 'Unavailable')[None, :], 0.0, scores)
+
+
+def _candidate_rows(moves, movers):
+    if not moves or not movers:
+        return []
+    scores = score_matrix(moves, movers, _booked_days(moves))
+    keep = min(CANDIDATES_PER_MOVE, len(movers))
+    # argpartition finds each row's top `keep` movers without a full sort.
+    top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+    rows = []
+    for i, move in enumerate(moves):
+        for j in top[i].tolist():
+            score = float(scores[i, j])
+            if score >= MIN_SCORE:
+                rows.append({"mover_id": movers[j][0], "move_id": move.id, "score": round(score, 4)})
+    return rows
+
+
+def _open_moves(where):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+    return (
+        db.select(Move.id, Move.move_date, Move.from_address, Move.from_lat, Move.from_lon, User.house_type)
+        .join(User, Move.user_id == User.id)
+        .where(Move.move_status.in_(OPEN_STATUSES), Move.move_date >= today, *where)
+    )
+
+
+def refresh_move_candidates(move_ids):
+    # Incremental update after moves are created or patched. Only these moves'
+    # candidate rows change.
+    move_ids = list(move_ids)
+    db.session.execute(db.delete(MoveCandidate).where(MoveCandidate.move_id.in_(move_ids)))
+    moves = db.session.execute(_open_moves([Move.id.in_(move_ids)])).all()
+    # Request path: only already geocoded mover locations are used.
+    rows = _candidate_rows(moves, _load_movers(fetch=False))
+    if rows:
+        db.session.execute(db.insert(MoveCandidate), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def rebuild_candidates(batch_size=2000):
+    # Full rebuild, e.g. after movers join or change availability.
+    db.session.execute(db.delete(MoveCandidate))
+    movers = _load_movers()
+    last_id = 0
+    total = 0
+    while True:
+        moves = db.session.execute(
+            _open_moves([Move.id > last_id]).order_by(Move.id).limit(batch_size)
+        ).all()
+        if not moves:
+            break
+        rows = _candidate_rows(moves, movers)
+        if rows:
+            db.session.execute(db.insert(MoveCandidate), rows)
+        total += len(rows)
+        last_id = moves[-1].id
+    db.session.commit()
+    return total
+
+
+def top_candidates(mover_id, limit):
+    # Indexed top-K read on (mover_id, score).
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+    return db.session.execute(
+        db.select(MoveCandidate.score, Move)
+        .join(Move, MoveCandidate.move_id == Move.id)
+        .where(MoveCandidate.mover_id == mover_id, Move.move_date >= today)
+        .order_by(MoveCandidate.score.desc(), MoveCandidate.move_id)
+        .limit(limit)
+    ).all()
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    with create_app().app_context():
+        print(f"Stored {rebuild_candidates()} move candidates")
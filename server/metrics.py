@@ -0,0 +1,382 @@
+import bisect
+import math
+import threading
+import time
+from threading import get_ident
+from flask import Response, g, request
+from flask_jwt_extended.default_callbacks import default_decode_key_callback
+from sqlalchemy.pool import QueuePool
+from models import db
+from hashing import hashing
+from cache import cache
+from compression import compressor
+from ratelimit import rate_limiter
+from profiling import profiler
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Sharded:
+    # Each thread writes only to its own dict, so the hot path takes no lock.
+    # samples() merges the shards. Dict copies are atomic under the GIL.
+    def __init__(self):
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            with self._lock:
+                shard = self._shards[get_ident()] = {}
+        return shard
+
+    def _snapshots(self):
+        with self._lock:
+            shards = list(self._shards.values())
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def inc(self, labels=(), amount=1.0):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def samples(self):
+        totals = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return [(self.name, labels, '', value) for labels, value in sorted(totals.items())]
+
+
+class Gauge(Counter):
+    # Up/down gauge. Each thread's shard holds its own net change, and
+    # those sum to the current value.
+    kind = 'gauge'
+
+    def dec(self, labels=(), amount=1.0):
+        self.inc(labels, -amount)
+
+
+class CallbackGauge:
+    # Read at scrape time from `fn()`, which returns {label_values: value}.
+    def __init__(self, name, documentation, labelnames, fn, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.fn = fn
+        self.kind = kind
+
+    def samples(self):
+        return [(self.name, labels, '', value) for labels, value in sorted(self.fn().items())]
+
+
+class Histogram(_Sharded):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.bounds = tuple(buckets)
+
+    def observe(self, labels, value):
+        # Per label set: one count per bucket (non-cumulative), then sum and count.
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            state = shard[labels] = [0] * (len(self.bounds) + 1) + [0.0, 0]
+        state[bisect.bisect_left(self.bounds, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def samples(self):
+        merged = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                total = merged.get(labels)
+                merged[labels] = list(state) if total is None else [a + b for a, b in zip(total, state)]
+        return _histogram_samples(self.name, self.bounds, merged)
+
+
+def _histogram_samples(name, bounds, states):
+    # states: {labels: [per-bucket counts..., sum, count]}
+    out = []
+    for labels, state in sorted(states.items()):
+        cumulative = 0
+        for bound, count in zip(bounds + (math.inf,), state):
+            cumulative += count
+            out.append((name + '_bucket', labels, f'le="{_format_value(bound)}"', cumulative))
+        out.append((name + '_sum', labels, '', state[-2]))
+        out.append((name + '_count', labels, '', state[-1]))
+    return out
+
+
+def _merge(states, labels, values):
+    total = states.get(labels)
+    states[labels] = list(values) if total is None else [a + b for a, b in zip(total, values)]
+
+
+class RequestMetrics(_Sharded):
+    """Request count, latency, response size and in-flight gauge for HTTP.
+
+    All observations for one (method, endpoint, status) share a single
+    state list, so recording a request costs one shard lookup and a few
+    list increments rather than one per metric. The four families are
+    split out at scrape time. Layout of a state list:
+    [latency buckets..., latency sum, size buckets..., size sum, size count, requests]
+    In-flight counts live in the same shard, keyed by the endpoint string.
+    """
+
+    name = 'http_requests'
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        super().__init__()
+        self.latency_bounds = tuple(latency_buckets)
+        self.size_bounds = tuple(size_buckets)
+        self._latency_sum = len(self.latency_bounds) + 1
+        self._size_start = self._latency_sum + 1
+        self._size_sum = self._size_start + len(self.size_bounds) + 1
+        self._template = [0] * (self._size_sum + 3)
+        self._template[self._latency_sum] = 0.0
+        self._template[self._size_sum] = 0.0
+
+    def started(self, endpoint):
+        shard = self._shard()
+        shard[endpoint] = shard.get(endpoint, 0) + 1
+
+    def finished(self, endpoint):
+        shard = self._shard()
+        shard[endpoint] = shard.get(endpoint, 0) - 1
+
+    def record(self, method, endpoint, status, seconds, size):
+        shard = self._shard()
+        key = (method, endpoint, status)
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = list(self._template)
+        state[bisect.bisect_left(self.latency_bounds, seconds)] += 1
+        state[self._latency_sum] += seconds
+        if size is not None:
+            state[self._size_start + bisect.bisect_left(self.size_bounds, size)] += 1
+            state[self._size_sum] += size
+            state[-2] += 1
+        state[-1] += 1
+
+    def families(self):
+        in_flight, requests, latency, sizes = {}, {}, {}, {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                if isinstance(key, str):
+                    in_flight[(key,)] = in_flight.get((key,), 0) + value
+                    continue
+                method, endpoint, status = key
+                requests[(method, endpoint, str(status))] = requests.get((method, endpoint, str(status)), 0) + value[-1]
+                _merge(latency, (method, endpoint), value[:self._size_start] + [value[-1]])
+                _merge(sizes, (endpoint,), value[self._size_start:-1])
+        return [
+            ('http_requests_total', 'HTTP requests handled.', 'counter', ('method', 'endpoint', 'status'),
+             [('http_requests_total', labels, '', value) for labels, value in sorted(requests.items())]),
+            ('http_request_duration_seconds', 'Request latency.', 'histogram', ('method', 'endpoint'),
+             _histogram_samples('http_request_duration_seconds', self.latency_bounds, latency)),
+            ('http_response_size_bytes', 'Response body size.', 'histogram', ('endpoint',),
+             _histogram_samples('http_response_size_bytes', self.size_bounds, sizes)),
+            ('http_requests_in_flight', 'Requests currently being handled.', 'gauge', ('endpoint',),
+             [('http_requests_in_flight', labels, '', value) for labels, value in sorted(in_flight.items())]),
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        # Re-registering a name (e.g. a second app instance) replaces it.
+        self._metrics = [m for m in self._metrics if m.name != metric.name] + [metric]
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, labelnames, fn, kind='gauge'):
+        return self.register(CallbackGauge(name, documentation, labelnames, fn, kind))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                if hasattr(metric, 'families'):
+                    families = metric.families()
+                else:
+                    families = [(metric.name, metric.documentation, metric.kind, metric.labelnames, metric.samples())]
+            except Exception:
+                # A failing source (e.g. no database) must not break the scrape.
+                continue
+            for family, documentation, kind, labelnames, samples in families:
+                lines.append(f'# HELP {family} {documentation}')
+                lines.append(f'# TYPE {family} {kind}')
+                for name, labels, extra, value in samples:
+                    lines.append(f'{name}{_format_labels(labelnames, labels, extra)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+HTTP = registry.register(RequestMetrics())
+POOL_WAIT = registry.histogram('db_pool_checkout_wait_seconds', 'Time waiting for a pooled DB connection.')
+JWT_VERIFY = registry.histogram('jwt_verification_seconds', 'JWT signature, claims and revocation checks.')
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long each checkout waited for a connection.
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe((), time.perf_counter() - started)
+
+
+def _endpoint():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _before_request():
+    endpoint = _endpoint()
+    g.metrics_started = time.perf_counter()
+    g.metrics_endpoint = endpoint
+    HTTP.started(endpoint)
+
+
+def _after_request(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        # Streamed responses have no length up front and are not sized.
+        HTTP.record(request.method, g.metrics_endpoint, response.status_code,
+                    time.perf_counter() - started, response.content_length)
+    return response
+
+
+def _teardown_request(exc):
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is not None:
+        HTTP.finished(endpoint)
+
+
+def jwt_verified():
+    # Called from the blocklist check, the last step of verification.
+    started = g.pop('jwt_started', None)
+    if started is not None:
+        JWT_VERIFY.observe((), time.perf_counter() - started)
+
+
+def init_jwt(jwt):
+    # The decode key loader runs at the start of token verification.
+    @jwt.decode_key_loader
+    def timed_decode_key(jwt_header, jwt_payload):
+        g.jwt_started = time.perf_counter()
+        return default_decode_key_callback(jwt_header, jwt_payload)
+
+
+def _hashing_jobs():
+    stats = hashing.metrics()
+    return {(outcome,): stats[outcome] for outcome in ('completed', 'rejected', 'timed_out', 'failed')}
+
+
+def _cache_requests():
+    return {
+        (key, outcome): count
+        for key, counters in cache.stats().items()
+        for outcome, count in counters.items()
+    }
+
+
+def _compression_totals(field):
+    def collect():
+        return {(encoding,): stats[field] for encoding, stats in compressor.stats().items()}
+    return collect
+
+
+def _sql_totals(field, scale=1.0):
+    def collect():
+        with profiler._lock:
+            return {(endpoint,): totals[field] * scale for endpoint, totals in profiler.endpoints.items()}
+    return collect
+
+
+def _pool_checked_out():
+    pool = db.engine.pool
+    return {(): pool.checkedout()} if hasattr(pool, 'checkedout') else {}
+
+
+def init_metrics(app):
+    # Request instrumentation, plus sources that are read at scrape time.
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    registry.callback('password_hash_jobs_total', 'Password hash jobs by outcome.', ('outcome',),
+                      _hashing_jobs, 'counter')
+    registry.callback('password_hash_wait_seconds_total', 'Time hash jobs waited for a worker.', (),
+                      lambda: {(): hashing.metrics()["wait_seconds_total"]}, 'counter')
+    registry.callback('cache_requests_total', 'Response cache lookups by key and outcome.', ('key', 'outcome'),
+                      _cache_requests, 'counter')
+    registry.callback('http_compressed_responses_total', 'Responses sent compressed, by encoding.', ('encoding',),
+                      _compression_totals("responses"), 'counter')
+    registry.callback('http_compression_input_bytes_total', 'Body bytes before compression.', ('encoding',),
+                      _compression_totals("bytes_in"), 'counter')
+    registry.callback('http_compression_output_bytes_total', 'Body bytes after compression.', ('encoding',),
+                      _compression_totals("bytes_out"), 'counter')
+    registry.callback('http_compression_seconds_total', 'CPU time spent compressing.', ('encoding',),
+                      _compression_totals("seconds"), 'counter')
+    registry.callback('rate_limited_requests_total', 'Requests rejected by a rate limit, by limit and key.',
+                      ('limit', 'scope'), rate_limiter.stats, 'counter')
+    registry.callback('sql_queries_total', 'SQL statements executed, by endpoint.', ('endpoint',),
+                      _sql_totals("queries"), 'counter')
+    registry.callback('sql_query_seconds_total', 'Time spent in SQL, by endpoint.', ('endpoint',),
+                      _sql_totals("db_ms", 0.001), 'counter')
+    registry.callback('sql_n_plus_one_requests_total', 'Requests with a repeated statement shape.', ('endpoint',),
+                      _sql_totals("n_plus_one"), 'counter')
+    registry.callback('sql_slow_queries_total', 'Statements over the slow query threshold.', ('endpoint',),
+                      _sql_totals("slow_queries"), 'counter')
+    registry.callback('db_pool_checked_out', 'Connections currently checked out of the pool.', (),
+                      _pool_checked_out)
+    app.extensions['metrics'] = registry
+
+
+def metrics_response():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
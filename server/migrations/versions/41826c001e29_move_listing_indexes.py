@@ -0,0 +1,36 @@
+"""move listing indexes
+
+Revision ID: 41826c001e29
+Revises: 99155e7d86c5
+Create Date: 2025-05-12 09:41:18.204551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41826c001e29'
+down_revision = '99155e7d86c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination orders on (created_at, id); rows without a timestamp
+    # would fall outside every page, so give them one first.
+    op.execute("UPDATE moves SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+
+    with op.batch_alter_table('moves', schema=None) as batch_op:
+        batch_op.create_index('ix_moves_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_moves_move_status_created_at_id', ['move_status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_moves_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_moves_move_date', ['move_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('moves', schema=None) as batch_op:
+        batch_op.drop_index('ix_moves_move_date')
+        batch_op.drop_index('ix_moves_user_id_created_at_id')
+        batch_op.drop_index('ix_moves_move_status_created_at_id')
+        batch_op.drop_index('ix_moves_created_at_id')
@@ -0,0 +1,73 @@
+"""lookup indexes
+
+Revision ID: 73d92cc125ba
+Revises: 41826c001e29
+Create Date: 2025-05-14 16:02:51.773310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '73d92cc125ba'
+down_revision = '41826c001e29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_reset_token', ['reset_token'], unique=False)
+
+    with op.batch_alter_table('moves', schema=None) as batch_op:
+        batch_op.create_index('ix_moves_user_id_id', ['user_id', 'id'], unique=False)
+
+    with op.batch_alter_table('quotes', schema=None) as batch_op:
+        batch_op.create_index('ix_quotes_mover_id', ['mover_id'], unique=False)
+        batch_op.create_index('ix_quotes_move_id', ['move_id'], unique=False)
+
+    with op.batch_alter_table('inventory_users', schema=None) as batch_op:
+        batch_op.create_index('ix_inventory_users_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_inventory_users_inventory_id', ['inventory_id'], unique=False)
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.create_index('ix_inventory_property_id', ['property_id'], unique=False)
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_move_id', ['move_id'], unique=False)
+        batch_op.create_index('ix_bookings_mover_id', ['mover_id'], unique=False)
+
+    # ilike('%term%') can only use a trigram index, which needs pg_trgm.
+    # Other databases get a plain index on item_name.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_inventory_item_name_trgm', 'inventory', ['item_name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'item_name': 'gin_trgm_ops'})
+    else:
+        op.create_index('ix_inventory_item_name_trgm', 'inventory', ['item_name'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_item_name_trgm', table_name='inventory')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_mover_id')
+        batch_op.drop_index('ix_bookings_move_id')
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_property_id')
+
+    with op.batch_alter_table('inventory_users', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_users_inventory_id')
+        batch_op.drop_index('ix_inventory_users_user_id_id')
+
+    with op.batch_alter_table('quotes', schema=None) as batch_op:
+        batch_op.drop_index('ix_quotes_move_id')
+        batch_op.drop_index('ix_quotes_mover_id')
+
+    with op.batch_alter_table('moves', schema=None) as batch_op:
+        batch_op.drop_index('ix_moves_user_id_id')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_reset_token')
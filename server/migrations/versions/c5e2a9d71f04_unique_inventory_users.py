@@ -0,0 +1,39 @@
+"""unique inventory users
+
+Revision ID: c5e2a9d71f04
+Revises: 24346ddf4dc1
+Create Date: 2025-06-09 14:12:40.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e2a9d71f04'
+down_revision = '24346ddf4dc1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold duplicate (user, item) records into the oldest one, summing their
+    # quantities, before the constraint can be added.
+    op.execute("""
+        UPDATE inventory_users SET quantity = (
+            SELECT SUM(COALESCE(d.quantity, 1)) FROM inventory_users d
+            WHERE d.user_id = inventory_users.user_id AND d.inventory_id = inventory_users.inventory_id
+        )
+        WHERE id IN (SELECT MIN(id) FROM inventory_users GROUP BY user_id, inventory_id HAVING COUNT(*) > 1)
+    """)
+    op.execute("""
+        DELETE FROM inventory_users
+        WHERE id NOT IN (SELECT MIN(id) FROM inventory_users GROUP BY user_id, inventory_id)
+    """)
+    with op.batch_alter_table('inventory_users', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_inventory_users_user_id_inventory_id', ['user_id', 'inventory_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('inventory_users', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_inventory_users_user_id_inventory_id', type_='unique')
@@ -1,16 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy_serializer import SerializerMixin
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, select
+import datetime
+import decimal
+from operator import attrgetter
+from database import RoutingSession
 
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 
-db = SQLAlchemy(metadata=metadata)
+db = SQLAlchemy(metadata=metadata, session_options={'class_': RoutingSession})
 
 # Users Table
 class User(db.Model, SerializerMixin):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_reset_token', 'reset_token'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), unique=True, nullable=False)
@@ -72,11 +79,19 @@ class Property(db.Model, SerializerMixin):
 # Inventory Table
 class Inventory(db.Model, SerializerMixin):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.Index('ix_inventory_property_id', 'property_id'),
+        # Trigram index so ilike('%term%') can avoid a sequential scan on Postgres.
+        db.Index('ix_inventory_item_name_trgm', 'item_name',
+                 postgresql_using='gin', postgresql_ops={'item_name': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     item_name = db.Column(db.String(150), nullable=False)
     image = db.Column(db.String(900))
     property_id = db.Column(db.Integer, db.ForeignKey('properties.id', ondelete="CASCADE"), nullable=False)
+    volume_m3 = db.Column(db.Float, nullable=True)
+    weight_kg = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.now())
     updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
 
@@ -86,6 +101,12 @@ class Inventory(db.Model, SerializerMixin):
 # Inventory User Table
 class InventoryUser(db.Model, SerializerMixin):
     __tablename__ = 'inventory_users'
+    __table_args__ = (
+        # One record per item and user; adding the item again bumps its quantity.
+        db.UniqueConstraint('user_id', 'inventory_id', name='uq_inventory_users_user_id_inventory_id'),
+        db.Index('ix_inventory_users_user_id_id', 'user_id', 'id'),
+        db.Index('ix_inventory_users_inventory_id', 'inventory_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
@@ -99,6 +120,15 @@ class InventoryUser(db.Model, SerializerMixin):
 # Moves Table
 class Move(db.Model, SerializerMixin):
     __tablename__ = 'moves'
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), optionally narrowed by status or owner.
+        db.Index('ix_moves_created_at_id', 'created_at', 'id'),
+        db.Index('ix_moves_move_status_created_at_id', 'move_status', 'created_at', 'id'),
+        db.Index('ix_moves_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_moves_move_date', 'move_date'),
+        # Owner-scoped single move lookups (SingleMove, MovePatchResource).
+        db.Index('ix_moves_user_id_id', 'user_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
@@ -114,6 +144,10 @@ class Move(db.Model, SerializerMixin):
 
 
     distance = db.Column(db.Float, nullable=True)
+    from_lat = db.Column(db.Float, nullable=True)
+    from_lon = db.Column(db.Float, nullable=True)
+    to_lat = db.Column(db.Float, nullable=True)
+    to_lon = db.Column(db.Float, nullable=True)
 
     # Relationships
     bookings = db.relationship('Booking', backref='move', lazy=True, cascade="all, delete-orphan")
@@ -123,6 +157,10 @@ class Move(db.Model, SerializerMixin):
 # Bookings Table
 class Booking(db.Model, SerializerMixin):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        db.Index('ix_bookings_move_id', 'move_id'),
+        db.Index('ix_bookings_mover_id', 'mover_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     move_id = db.Column(db.Integer, db.ForeignKey('moves.id', ondelete="CASCADE"), nullable=False)
@@ -157,6 +195,10 @@ class Payment(db.Model, SerializerMixin):
 # Quote Table
 class Quote(db.Model, SerializerMixin):
     __tablename__ = 'quotes'
+    __table_args__ = (
+        db.Index('ix_quotes_mover_id', 'mover_id'),
+        db.Index('ix_quotes_move_id', 'move_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     mover_id = db.Column(db.Integer, db.ForeignKey('movers.id', ondelete="CASCADE"), nullable=False)
@@ -165,3 +207,132 @@ class Quote(db.Model, SerializerMixin):
     details = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=db.func.now())
     updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+# Email Outbox Table
+class EmailOutbox(db.Model, SerializerMixin):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sender = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+# Move Candidates Table (precomputed mover matches, maintained by matching.py)
+class MoveCandidate(db.Model, SerializerMixin):
+    __tablename__ = 'move_candidates'
+    __table_args__ = (
+        db.Index('ix_move_candidates_mover_id_score', 'mover_id', 'score'),
+        db.Index('ix_move_candidates_move_id', 'move_id'),
+    )
+
+    mover_id = db.Column(db.Integer, db.ForeignKey('movers.id', ondelete="CASCADE"), primary_key=True)
+    move_id = db.Column(db.Integer, db.ForeignKey('moves.id', ondelete="CASCADE"), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+# Geocoded Addresses Table (normalized address -> coordinates cache)
+class GeocodedAddress(db.Model, SerializerMixin):
+    __tablename__ = 'geocoded_addresses'
+
+    id = db.Column(db.Integer, primary_key=True)
+    normalized = db.Column(db.String(255), unique=True, nullable=False)
+    # Both NULL when the provider could not place the address.
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    provider = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+
+# Precompiled column serializers for list endpoints.
+#
+# SerializerMixin.to_dict re-parses its rules and walks every relationship for
+# each object it serializes. The list endpoints only ever return plain columns,
+# so each RowSerializer generates one encoder function for a fixed field set
+# and applies it to the Row tuples of a column-only select(). No ORM entities
+# are hydrated. Output matches to_dict's default date/time formats.
+def _encoder_for(column_type):
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return None
+    if python_type is datetime.datetime:
+        return lambda value, fmt=SerializerMixin.datetime_format: value.strftime(fmt)
+    if python_type is datetime.date:
+        return lambda value, fmt=SerializerMixin.date_format: value.strftime(fmt)
+    if python_type is datetime.time:
+        return lambda value, fmt=SerializerMixin.time_format: value.strftime(fmt)
+    if python_type is decimal.Decimal:
+        return lambda value, fmt=SerializerMixin.decimal_format: fmt.format(value)
+    return None
+
+
+class RowSerializer:
+    def __init__(self, model, only=None, exclude=()):
+        table_columns = model.__table__.columns
+        keys = [c.key for c in table_columns] if only is None else list(only)
+        keys = [key for key in keys if key not in exclude]
+
+        self.model = model
+        self.keys = tuple(keys)
+        self.columns = tuple(getattr(model, key) for key in keys)
+
+        # Build the body of a dict literal once, e.g. {'id': r[0], 'created_at': _e1(r[1]) ...}
+        namespace = {}
+        parts = []
+        for index, key in enumerate(keys):
+            encoder = _encoder_for(table_columns[key].type)
+            if encoder is None:
+                parts.append(f"{key!r}: r[{index}]")
+            else:
+                namespace[f"_e{index}"] = encoder
+                parts.append(f"{key!r}: (_e{index}(r[{index}]) if r[{index}] is not None else None)")
+        source = f"def encode(r):\n    return {{{', '.join(parts)}}}\n"
+        exec(compile(source, f"<RowSerializer {model.__name__}>", "exec"), namespace)
+        self.encode = namespace["encode"]
+        self._getter = attrgetter(*keys) if len(keys) > 1 else (lambda o, key=keys[0]: (getattr(o, key),))
+        self._subsets = {}
+
+    def select(self):
+        return select(*self.columns)
+
+    def rows(self, rows):
+        encode = self.encode
+        return [encode(row) for row in rows]
+
+    def encode_object(self, obj):
+        # Same output as encode(), read from an already loaded ORM instance.
+        return self.encode(self._getter(obj))
+
+    def subset(self, fields):
+        # Sparse fieldsets: a narrower serializer, compiled once per field list.
+        fields = tuple(fields)
+        serializer = self._subsets.get(fields)
+        if serializer is None:
+            unknown = [field for field in fields if field not in self.keys]
+            if unknown or not fields:
+                raise ValueError(f"Unknown {self.model.__name__} fields: {', '.join(unknown)}")
+            serializer = self._subsets[fields] = RowSerializer(self.model, only=fields)
+        return serializer
+
+
+user_serializer = RowSerializer(User)
+mover_serializer = RowSerializer(Mover)
+property_serializer = RowSerializer(Property)
+inventory_serializer = RowSerializer(Inventory)
+move_serializer = RowSerializer(Move)
+quote_serializer = RowSerializer(Quote, only=(
+    'id', 'mover_id', 'move_id', 'quote_amount', 'details', 'created_at', 'updated_at'
+))
+mover_summary_serializer = RowSerializer(Mover, only=(
+    'id', 'company_name', 'email', 'phone', 'image', 'rating', 'availability_status', 'house_type'
+))
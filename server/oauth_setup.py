@@ -1,10 +1,34 @@
 import os
-from extensions import oauth
-
-google = oauth.register(
-    name='google',
-    client_id=os.getenv('CLIENT_ID'),
-    client_secret=os.getenv('CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid profile email'}
-)
\ No newline at end of file
+import threading
+from flask import current_app
+
+_lock = threading.Lock()
+
+
+def init_oauth(app):
+    app.config.setdefault('GOOGLE_CLIENT_ID', os.getenv('CLIENT_ID'))
+    app.config.setdefault('GOOGLE_CLIENT_SECRET', os.getenv('CLIENT_SECRET'))
+
+
+def google_client():
+    """The app's Google OAuth client, registered on first use.
+
+    authlib (and requests under it) is only needed by the Google sign-in
+    routes, so it is imported then instead of when every worker boots.
+    """
+    app = current_app._get_current_object()
+    client = app.extensions.get('google_oauth')
+    if client is None:
+        with _lock:
+            client = app.extensions.get('google_oauth')
+            if client is None:
+                from authlib.integrations.flask_client import OAuth
+                client = OAuth(app).register(
+                    name='google',
+                    client_id=app.config['GOOGLE_CLIENT_ID'],
+                    client_secret=app.config['GOOGLE_CLIENT_SECRET'],
+                    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+                    client_kwargs={'scope': 'openid profile email'}
+                )
+                app.extensions['google_oauth'] = client
+    return client
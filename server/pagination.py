@@ -0,0 +1,90 @@
+import base64
+import datetime
+from sqlalchemy import DateTime, String, literal, tuple_, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def clamp_limit(limit):
+    if not limit or limit < 1:
+        return DEFAULT_LIMIT
+    return min(limit, MAX_LIMIT)
+
+
+class StoredTimestamp(TypeDecorator):
+    """A DateTime column's value exactly as the database stores it.
+
+    SQLite keeps DATETIME as text, and not always in one format: rows written
+    with CURRENT_TIMESTAMP (func.now()) hold '2025-01-01 10:00:00', while
+    SQLAlchemy writes '2025-01-01 10:00:00.000000'. Comparing the column to a
+    bound datetime then treats equal timestamps as different. There, this
+    reads and binds the stored text unchanged; elsewhere it is a DateTime.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(String() if dialect.name == 'sqlite' else DateTime())
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str) and dialect.name != 'sqlite':
+            return datetime.datetime.fromisoformat(value)
+        return value
+
+
+def encode_cursor(created_at, row_id):
+    # created_at is a datetime, or the stored text on SQLite (StoredTimestamp).
+    if isinstance(created_at, datetime.datetime):
+        created_at = created_at.isoformat()
+    raw = f"{created_at}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        datetime.datetime.fromisoformat(created_at)
+        return created_at, int(row_id)
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor")
+
+
+def keyset_page(session, stmt, created_col, id_col, limit, cursor=None):
+    # Newest first on (created_at, id). The row-value comparison lets the
+    # database seek straight into the composite index instead of counting
+    # past an OFFSET, so every page costs the same regardless of depth.
+    # `stmt` must select both columns so the next cursor can be built.
+    rows = session.execute(page_stmt(stmt, created_col, id_col, limit, cursor)).all()
+    return _split_page(rows, limit)
+
+
+async def keyset_page_async(session, stmt, created_col, id_col, limit, cursor=None):
+    # keyset_page for an AsyncSession.
+    rows = (await session.execute(page_stmt(stmt, created_col, id_col, limit, cursor))).all()
+    return _split_page(rows, limit)
+
+
+def page_stmt(stmt, created_col, id_col, limit, cursor=None):
+    # The statement keyset_page runs: one page plus one row to detect a next
+    # page. The last column is created_at as stored, for the next cursor.
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(created_col, id_col) < tuple_(literal(created_at, StoredTimestamp()), row_id))
+    stmt = stmt.add_columns(type_coerce(created_col, StoredTimestamp()).label('cursor_created_at'))
+    return stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def _split_page(rows, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.cursor_created_at, last.id)
+    return rows, next_cursor
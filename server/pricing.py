@@ -0,0 +1,121 @@
+import numpy as np
+from models import db, Move, Inventory, InventoryUser, Property
+
+
+class RateCard:
+    def __init__(self, base_fee=50.0, per_km=2.0, per_m3=25.0, per_kg=0.1,
+                 default_volume_m3=0.5, default_weight_kg=20.0, property_multipliers=None):
+        self.base_fee = base_fee
+        self.per_km = per_km
+        self.per_m3 = per_m3
+        self.per_kg = per_kg
+        # Used for catalog items that have no measurements yet.
+        self.default_volume_m3 = default_volume_m3
+        self.default_weight_kg = default_weight_kg
+        # Handling surcharge by the item's Property.property_type.
+        self.property_multipliers = property_multipliers or {'Apartment': 1.15, 'House': 1.0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**config.get('RATE_CARD', {}))
+
+
+def price_vector(rate_card, move_owner, distance, item_owner, quantity, volume, weight, multiplier):
+    """Prices for M moves from N inventory rows in one pass.
+
+    move_owner (M,) and item_owner (N,) are dense owner indexes, so moves
+    by the same user share that user's inventory. Missing distances count
+    as zero and missing measurements use the rate card defaults.
+    """
+    volume = np.where(np.isnan(volume), rate_card.default_volume_m3, volume)
+    weight = np.where(np.isnan(weight), rate_card.default_weight_kg, weight)
+    item_cost = quantity * (volume * rate_card.per_m3 + weight * rate_card.per_kg) * multiplier
+
+    owners = int(max(move_owner.max(initial=-1), item_owner.max(initial=-1))) + 1
+    goods = np.bincount(item_owner, weights=item_cost, minlength=owners)
+    prices = rate_card.base_fee + rate_card.per_km * np.nan_to_num(distance) + goods[move_owner]
+    return np.round(prices, 2)
+
+
+def _as_float(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def estimate_prices(rate_card, moves):
+    """Estimate prices for `moves`, a sequence of (move_id, user_id, distance).
+
+    Loads the inventory of every user involved with one query and returns
+    {move_id: price}.
+    """
+    if not moves:
+        return {}
+    move_ids, user_ids, distances = zip(*moves)
+
+    items = db.session.execute(
+        db.select(InventoryUser.user_id, InventoryUser.quantity, Inventory.volume_m3,
+                  Inventory.weight_kg, Property.property_type)
+        .join(Inventory, InventoryUser.inventory_id == Inventory.id)
+        .join(Property, Inventory.property_id == Property.id)
+        .where(InventoryUser.user_id.in_(set(user_ids)))
+    ).all()
+    item_users, quantities, volumes, weights, property_types = zip(*items) if items else ((),) * 5
+
+    # Map user ids onto dense indexes shared by moves and items.
+    _, owners = np.unique(np.array(user_ids + item_users, dtype=np.int64), return_inverse=True)
+    multipliers = rate_card.property_multipliers
+    prices = price_vector(
+        rate_card,
+        move_owner=owners[:len(user_ids)],
+        distance=_as_float(distances),
+        item_owner=owners[len(user_ids):],
+        quantity=np.array([1 if q is None else q for q in quantities], dtype=np.float64),
+        volume=_as_float(volumes),
+        weight=_as_float(weights),
+        multiplier=np.array([multipliers.get(t, 1.0) for t in property_types], dtype=np.float64),
+    )
+    return dict(zip(move_ids, prices.tolist()))
+
+
+def estimate_move_price(rate_card, user_id, distance):
+    return estimate_prices(rate_card, [(None, int(user_id), distance)])[None]
+
+
+def reprice_moves(rate_card, status='Pending', batch_size=5000, dry_run=False):
+    # Walks the matching moves in id order, one batch per statement pair:
+    # a priced read and an executemany UPDATE.
+    last_id = 0
+    repriced = 0
+    while True:
+        moves = db.session.execute(
+            db.select(Move.id, Move.user_id, Move.distance)
+            .where(Move.move_status == status, Move.id > last_id)
+            .order_by(Move.id)
+            .limit(batch_size)
+        ).all()
+        if not moves:
+            break
+        prices = estimate_prices(rate_card, [tuple(m) for m in moves])
+        if not dry_run:
+            db.session.execute(db.update(Move), [
+                {"id": move_id, "estimated_price": price} for move_id, price in prices.items()
+            ])
+            db.session.commit()
+        repriced += len(moves)
+        last_id = moves[-1].id
+    return repriced
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description="Re-estimate move prices with the current rate card")
+    parser.add_argument('--status', default='Pending')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        count = reprice_moves(RateCard.from_config(app.config), args.status, args.batch_size, args.dry_run)
+        print(f"Re-estimated {count} {args.status} moves{' (dry run)' if args.dry_run else ''}")
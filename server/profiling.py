@@ -0,0 +1,204 @@
+import collections
+import queue
+import re
+import threading
+import time
+from flask import g, has_request_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db
+
+# Bind parameter lists expanded by IN (...) vary in length; collapse them so
+# the same query with a different number of ids counts as one shape.
+_PARAM_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*,?)+\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    return _PARAM_LIST.sub('(...)', _WHITESPACE.sub(' ', statement)).strip()
+
+
+class RequestSQLStats:
+    __slots__ = ('started', 'count', 'duration', 'statements', 'slow')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = collections.Counter()
+        self.slow = []
+
+
+class SQLProfiler:
+    """Per-request SQL counters from engine cursor events.
+
+    Each request gets its query count, total DB time and repeated statement
+    shapes (N+1 detection) in a Server-Timing header. Per-endpoint totals are
+    kept for the /metrics resource. Statements slower than `slow_query_ms`
+    are logged with their EXPLAIN plan by a background thread, so the extra
+    round trip never delays a response. At most `explain_backlog` of them
+    wait for it; beyond that they are counted and dropped.
+    """
+
+    def __init__(self, n_plus_one_threshold=5, slow_query_ms=200.0, explain_slow=True, recent=50,
+                 explain_backlog=100):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow = explain_slow
+        self.endpoints = {}
+        self.recent_slow = collections.deque(maxlen=recent)
+        self.recent_n_plus_one = collections.deque(maxlen=recent)
+        self.dropped_slow = 0
+        self._lock = threading.Lock()
+        self._slow_queue = queue.Queue(maxsize=explain_backlog)
+        self._slow_thread = None
+
+    def init_app(self, app):
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+        self.slow_query_ms = app.config.get('SQL_SLOW_QUERY_MS', self.slow_query_ms)
+        self.explain_slow = app.config.get('SQL_EXPLAIN_SLOW', self.explain_slow)
+        # Listening on the Engine class covers every engine the app creates.
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions['sql_profiler'] = self
+
+    @staticmethod
+    def _start():
+        g.sql_stats = RequestSQLStats()
+
+    def _finish(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.duration * 1000
+        response.headers.add(
+            'Server-Timing', f'db;dur={db_ms:.2f};desc="{stats.count} queries", app;dur={total_ms:.2f}'
+        )
+
+        shapes = collections.Counter()
+        for statement, count in stats.statements.items():
+            shapes[statement_shape(statement)] += count
+        repeated = [(shape, count) for shape, count in shapes.items() if count > self.n_plus_one_threshold]
+
+        endpoint = request.endpoint or 'unmatched'
+        for shape, count in repeated:
+            current_app.logger.warning(f"Possible N+1 on {endpoint}: {count}x {shape[:300]}")
+            self.recent_n_plus_one.append({"endpoint": endpoint, "count": count, "statement": shape})
+        if stats.slow:
+            app = current_app._get_current_object()
+            for statement, parameters, duration in stats.slow:
+                self._submit_slow((app, endpoint, statement, parameters, duration))
+
+        with self._lock:
+            totals = self.endpoints.get(endpoint)
+            if totals is None:
+                totals = self.endpoints[endpoint] = {
+                    "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0,
+                    "n_plus_one": 0, "slow_queries": 0,
+                }
+            totals["requests"] += 1
+            totals["queries"] += stats.count
+            totals["max_queries"] = max(totals["max_queries"], stats.count)
+            totals["db_ms"] += db_ms
+            totals["n_plus_one"] += bool(repeated)
+            totals["slow_queries"] += len(stats.slow)
+        return response
+
+    def _submit_slow(self, item):
+        # Started by the first slow query, so prefork servers fork before any
+        # thread exists.
+        if self._slow_thread is None:
+            with self._lock:
+                if self._slow_thread is None:
+                    self._slow_thread = threading.Thread(target=self._report_slow, name="slow-query-explain",
+                                                         daemon=True)
+                    self._slow_thread.start()
+        try:
+            self._slow_queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped_slow += 1
+
+    def _report_slow(self):
+        while True:
+            app, endpoint, statement, parameters, duration = self._slow_queue.get()
+            try:
+                with app.app_context():
+                    plan = self._explain(statement, parameters) if self.explain_slow else None
+                    app.logger.warning(
+                        f"Slow query on {endpoint} ({duration * 1000:.1f} ms): {statement_shape(statement)[:500]}"
+                        + (f"\n{plan}" if plan else "")
+                    )
+                self.recent_slow.append({
+                    "endpoint": endpoint,
+                    "duration_ms": round(duration * 1000, 2),
+                    "statement": statement_shape(statement),
+                    "plan": plan,
+                })
+            except Exception as e:
+                app.logger.error(f"Slow query report failed: {str(e)}")
+            finally:
+                self._slow_queue.task_done()
+
+    @staticmethod
+    def _explain(statement, parameters):
+        # Plain EXPLAIN (no ANALYZE) on a separate pooled connection; the raw
+        # DBAPI cursor bypasses the engine events, so this isn't profiled.
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        engine = db.engine
+        prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(prefix + statement, parameters)
+                plan = '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+                cursor.close()
+            finally:
+                connection.close()
+            return plan
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, totals in self.endpoints.items():
+                endpoints[endpoint] = dict(totals)
+                endpoints[endpoint]["avg_queries"] = round(totals["queries"] / totals["requests"], 2)
+                endpoints[endpoint]["avg_db_ms"] = round(totals["db_ms"] / totals["requests"], 2)
+                endpoints[endpoint]["db_ms"] = round(totals["db_ms"], 2)
+        return {
+            "endpoints": endpoints,
+            "recent_slow_queries": list(self.recent_slow),
+            "recent_n_plus_one": list(self.recent_n_plus_one),
+            "dropped_slow_queries": self.dropped_slow,
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_stats' in g:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profile_start', None)
+    if started is None or not has_request_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is None:
+        return
+    duration = time.perf_counter() - started
+    stats.count += 1
+    stats.duration += duration
+    stats.statements[statement] += 1
+    if duration * 1000 >= profiler.slow_query_ms and not executemany:
+        stats.slow.append((statement, parameters, duration))
+
+
+profiler = SQLProfiler()
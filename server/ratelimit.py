@@ -0,0 +1,175 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from functools import wraps
+from flask import current_app, request
+import kvstore
+
+TOO_MANY_REQUESTS = {"message": "Too many requests, please try again later"}
+
+_LIMIT = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$')
+_UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit):
+    # "5/minute" or "3/10minutes" -> (5, 60) or (3, 600)
+    match = _LIMIT.match(limit)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {limit!r}")
+    count, multiple, unit = match.groups()
+    return int(count), int(multiple or 1) * _UNITS[unit]
+
+
+class TokenBucket:
+    """Per-process token buckets: `count` requests per `period`, refilled continuously.
+
+    One (tokens, last update) pair per key, so a check is a dict lookup under
+    a lock. At most `max_keys` keys are kept; the least recently used go first.
+    """
+
+    def __init__(self, count, period, max_keys=10000):
+        self.capacity = count
+        self.rate = count / period
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, now):
+        # Seconds until a token is available; 0 when one was taken.
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            if len(self._buckets) >= self.max_keys:
+                # Dicts keep insertion order and every check re-inserts its key.
+                self._buckets.pop(next(iter(self._buckets)), None)
+            self._buckets[key] = (tokens, now)
+        return wait
+
+
+class SlidingWindow:
+    """Sliding-window counter shared by all workers through a Redis-compatible store.
+
+    Hits are counted per fixed window with INCR. The previous window's count
+    is weighted by how much of it still overlaps the sliding window, so each
+    check costs at most three store calls, however many requests came before.
+    Rejected attempts count too: a client that keeps retrying stays blocked.
+    """
+
+    def __init__(self, client, count, period, prefix):
+        self.client = client
+        self.count = count
+        self.period = period
+        self.prefix = prefix
+
+    def hit(self, key, now):
+        window, elapsed = divmod(now, self.period)
+        current_key = f"{self.prefix}{key}:{int(window)}"
+        current = self.client.incr(current_key)
+        if current == 1:
+            self.client.expire(current_key, self.period * 2)
+        previous = int(self.client.get(f"{self.prefix}{key}:{int(window) - 1}") or 0)
+        overlap = 1 - elapsed / self.period
+        if previous * overlap + current <= self.count:
+            return 0.0
+        if current <= self.count:
+            # Wait for enough of the previous window to slide out.
+            return self.period * (1 - (self.count - current) / previous) - elapsed
+        # Over the limit within this window alone: wait for it to end, then
+        # for its weight to fall far enough to let one more request in.
+        return self.period - elapsed + self.period * (1 - (self.count - 1) / current)
+
+
+class RateLimiter:
+    """Throttles expensive endpoints per client IP and per submitted email.
+
+    Each limit is enforced twice: by an in-process token bucket, which turns
+    away a flood from one source without any network round trip, and by a
+    sliding window in the shared store (RATELIMIT_STORE_URL, or an in-process
+    LocalRedis when unset), which holds across all workers. Checks run before
+    the handler, so a rejected request never parses its arguments, queries
+    the database or hashes a password.
+    """
+
+    def __init__(self, prefix='ratelimit:'):
+        self.prefix = prefix
+        self.enabled = True
+        self.client = kvstore.LocalRedis()
+        self.overrides = {}
+        self._rules = {}
+        self._lock = threading.Lock()
+        self._rejected = {}
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        self.client = kvstore.connect(app.config.get('RATELIMIT_STORE_URL'))
+        self.overrides = app.config.get('RATELIMITS', {})
+        self._rules = {}
+
+    def _rule(self, name, scope, limit):
+        rule = self._rules.get((name, scope))
+        if rule is None:
+            with self._lock:
+                rule = self._rules.get((name, scope))
+                if rule is None:
+                    count, period = parse_limit(self.overrides.get(name, {}).get(scope, limit))
+                    rule = self._rules[(name, scope)] = (
+                        TokenBucket(count, period),
+                        SlidingWindow(self.client, count, period, f"{self.prefix}{name}:{scope}:"),
+                    )
+        return rule
+
+    def check(self, name, scope, limit, key):
+        # Seconds the client has to wait; 0 to let the request through.
+        bucket, window = self._rule(name, scope, limit)
+        now = time.time()
+        wait = bucket.take(key, now) or window.hit(key, now)
+        if wait:
+            counters = self._rejected
+            counters[(name, scope)] = counters.get((name, scope), 0) + 1
+        return wait
+
+    def limit(self, name, ip=None, email=None):
+        """Decorator: at most `ip` requests per client address and `email`
+        requests per submitted email address, e.g. ip='20/minute'.
+
+        Over either limit the handler is skipped and the client gets 429 with
+        Retry-After. RATELIMITS in the app config overrides the limits by
+        name, e.g. {"login": {"email": "10/minute"}}.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    wait = 0.0
+                    if ip:
+                        wait = self.check(name, 'ip', ip, request.remote_addr or 'unknown')
+                    address = _submitted_email() if email and not wait else None
+                    if address:
+                        wait = self.check(name, 'email', email, address)
+                    if wait:
+                        return TOO_MANY_REQUESTS, 429, {"Retry-After": str(max(1, math.ceil(wait)))}
+                return current_app.ensure_sync(fn)(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return dict(self._rejected)
+
+
+def _submitted_email():
+    # The raw address never goes into the shared store, only a digest of it.
+    body = request.get_json(silent=True)
+    value = body.get('email') if isinstance(body, dict) else request.form.get('email')
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return hashlib.sha1(value.strip().lower().encode('utf-8')).hexdigest()
+
+
+rate_limiter = RateLimiter()
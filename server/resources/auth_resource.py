@@ -1,19 +1,24 @@
+import hmac
 import random
 import datetime
 from flask import url_for, current_app, make_response, redirect
 from flask_restful import Resource, reqparse
 from models import db, User
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt
-from extensions import bcrypt
+from hashing import hashing, HashingBusy
 from blacklist import BLACKLIST
-from oauth_setup import google
-import resend
+from oauth_setup import google_client
+from mailer import enqueue_email
+from ratelimit import rate_limiter
 import uuid
 
 # Helper function to generate a 6-digit OTP
 def generate_otp():
     return random.randint(100000, 999999)
 
+# Returned when the password hashing queue is full
+BUSY_RESPONSE = ({"message": "Server is busy, please try again shortly"}, 503, {"Retry-After": "1"})
+
 # Signup Resource with OTP functionality
 class SignupResource(Resource):
     def post(self):
@@ -26,7 +31,10 @@ class SignupResource(Resource):
         if User.query.filter_by(email=args['email']).first():
             return {"message": "User with that email already exists"}, 400
 
-        hashed_password = bcrypt.generate_password_hash(args['password']).decode('utf-8')
+        try:
+            hashed_password = hashing.generate_password_hash(args['password'])
+        except HashingBusy:
+            return BUSY_RESPONSE
 
         # Create user with OTP details (ensure your User model has these fields)
         new_user = User(
@@ -38,9 +46,8 @@ class SignupResource(Resource):
             is_verified=False  # mark as unverified until OTP is confirmed
         )
         db.session.add(new_user)
-        db.session.commit()
 
-        # Send OTP email using Resend
+        # Queue the OTP email; it is committed together with the user.
         otp_email_params = {
             "from": "HamaNasi <onboarding@grnder.fueldash.net>",
             "to": [args['email']],
@@ -61,16 +68,14 @@ class SignupResource(Resource):
             """
         }
 
-        try:
-            resend.Emails.send(otp_email_params)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send OTP email: {str(e)}")
-            return {"message": "User created but failed to send OTP email"}, 500
+        enqueue_email(otp_email_params)
+        db.session.commit()
 
         return {"message": "User created. Please verify your email using the OTP sent.", "user_id": new_user.id}, 201
 
 # New Resource to verify OTP
 class VerifyOTPResource(Resource):
+    @rate_limiter.limit('verify_otp', ip='30/minute', email='5/10minutes')
     def post(self):
         parser = reqparse.RequestParser()
         parser.add_argument('email', type=str, required=True, help="Email is required!")
@@ -86,7 +91,8 @@ class VerifyOTPResource(Resource):
             return {"message": "OTP has expired"}, 400
 
         # Check if OTP matches
-        if user.otp_code != str(args['otp']):
+        # compare_digest: the time taken doesn't reveal how many leading digits matched
+        if not user.otp_code or not hmac.compare_digest(user.otp_code, str(args['otp'])):
             return {"message": "Invalid OTP code"}, 400
 
         # Mark user as verified and clear OTP fields
@@ -117,6 +123,7 @@ class VerifyOTPResource(Resource):
 
 # Login Resource 
 class LoginResource(Resource):
+    @rate_limiter.limit('login', ip='20/minute', email='5/minute')
     def post(self):
         parser = reqparse.RequestParser()
         parser.add_argument('email', type=str, required=True, help="Email is required!")
@@ -125,8 +132,19 @@ class LoginResource(Resource):
         args = parser.parse_args()
 
         user = User.query.filter_by(email=args['email']).first()
-        if not user or not bcrypt.check_password_hash(user.password, args['password']):
-            return {"message": "Invalid email or password"}, 401
+        try:
+            if not user or not hashing.check_password_hash(user.password, args['password']):
+                return {"message": "Invalid email or password"}, 401
+        except HashingBusy:
+            return BUSY_RESPONSE
+
+        # Upgrade hashes made with an older cost factor while we have the password.
+        if hashing.needs_rehash(user.password):
+            try:
+                user.password = hashing.generate_password_hash(args['password'])
+                db.session.commit()
+            except HashingBusy:
+                pass
 
         # Optionally check if the user's email is verified before login
         if not user.is_verified:
@@ -167,8 +185,8 @@ class LoginResource(Resource):
 class LogoutResource(Resource):
     @jwt_required()
     def post(self):
-        jti = get_jwt()["jti"]
-        BLACKLIST.add(jti)
+        token = get_jwt()
+        BLACKLIST.add(token["jti"], token.get("exp"))
         return {"message": "Successfully logged out"}, 200
 
 # Google Login Resources (unchanged)
@@ -176,7 +194,7 @@ class LoginGoogle(Resource):
     def get(self):
         try:
             redirect_url = url_for('authorize_google', _external=True)
-            return google.authorize_redirect(redirect_url)
+            return google_client().authorize_redirect(redirect_url)
         except Exception as e:
             current_app.logger.error(f"Error during Google login: {str(e)}")
             return {"message": "Error occurred during login"}, 500
@@ -184,17 +202,21 @@ class LoginGoogle(Resource):
 class AuthorizeGoogle(Resource):
     def get(self):
         try:
+            google = google_client()
             token = google.authorize_access_token()
         except Exception as e:
             current_app.logger.error(f"Error authorizing Google access token: {str(e)}")
             return {"message": "Failed to authorize access token", "error": str(e)}, 400
 
-        userinfo_endpoint = google.server_metadata.get('userinfo_endpoint')
-        if not userinfo_endpoint:
-            return {"message": "Userinfo endpoint not available"}, 500
-
-        res = google.get(userinfo_endpoint)
-        user_info = res.json()
+        # With the openid scope, authlib has already decoded the ID token's
+        # claims; only fall back to the userinfo endpoint without them.
+        user_info = token.get('userinfo')
+        if not user_info:
+            userinfo_endpoint = google.server_metadata.get('userinfo_endpoint')
+            if not userinfo_endpoint:
+                return {"message": "Userinfo endpoint not available"}, 500
+            res = google.get(userinfo_endpoint)
+            user_info = res.json()
         email = user_info.get('email')
         if not email:
             return {"message": "Email not found in user info"}, 400
@@ -226,6 +248,7 @@ class AuthorizeGoogle(Resource):
 
 
 class ResendOTPResource(Resource):
+    @rate_limiter.limit('resend_otp', ip='10/minute', email='3/10minutes')
     def post(self):
         parser = reqparse.RequestParser()
         parser.add_argument('email', type=str, required=True, help="Email is required!")
@@ -243,7 +266,6 @@ class ResendOTPResource(Resource):
         new_otp = generate_otp()  # Helper function defined earlier
         user.otp_code = new_otp
         user.otp_expires_at = datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
-        db.session.commit()
 
         # Prepare the OTP email parameters
         otp_email_params = {
@@ -266,16 +288,14 @@ class ResendOTPResource(Resource):
             """
         }
 
-        # Attempt to send the OTP email
-        try:
-            resend.Emails.send(otp_email_params)
-        except Exception as e:
-            current_app.logger.error(f"Failed to resend OTP email: {str(e)}")
-            return {"message": "Failed to resend OTP email"}, 500
+        # Queue the OTP email together with the new OTP
+        enqueue_email(otp_email_params)
+        db.session.commit()
 
         return {"message": "OTP resent successfully. Please check your email."}, 200
 
 class ForgotPasswordResource(Resource):
+    @rate_limiter.limit('forgot_password', ip='10/minute', email='3/hour')
     def post(self):
         parser = reqparse.RequestParser()
         parser.add_argument("email", type=str, required=True, help="Email is required!")
@@ -291,7 +311,6 @@ class ForgotPasswordResource(Resource):
 
         user.reset_token = reset_token
         user.reset_expires_at = reset_expires_at
-        db.session.commit()
 
         # Build a password reset link pointing to the frontend page.
         reset_link = f"http://localhost:3000/new-password?token={reset_token}"
@@ -316,11 +335,9 @@ class ForgotPasswordResource(Resource):
             """
         }
 
-        try:
-            resend.Emails.send(reset_email_params)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send reset password email: {str(e)}")
-            return {"message": "Failed to send reset password email"}, 500
+        # Queue the reset email together with the new token
+        enqueue_email(reset_email_params)
+        db.session.commit()
 
         return {"message": "Reset password email sent successfully"}, 200
 
@@ -341,7 +358,10 @@ class ResetPasswordResource(Resource):
             return {"message": "Reset token has expired"}, 400
 
         # Update the password (hash the new password)
-        hashed_password = bcrypt.generate_password_hash(args["new_password"]).decode("utf-8")
+        try:
+            hashed_password = hashing.generate_password_hash(args["new_password"])
+        except HashingBusy:
+            return BUSY_RESPONSE
         user.password = hashed_password
 
         # Clear the reset token fields
@@ -1,11 +1,18 @@
 from flask import current_app
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Inventory, InventoryUser
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Inventory, InventoryUser, inventory_serializer
+from streaming import wants_stream, stream_rows
+from cache import cache, INVENTORY_CATALOG_KEY
+from conditional import conditional
+from search import catalog_search, DEFAULT_RESULTS, MAX_RESULTS
+from database import read_replica
 
 # Inventory Resource (GET all, POST new item)
 class InventoryResource(Resource):
     @jwt_required()
+    @read_replica
     def get(self):
         try:
             parser = reqparse.RequestParser()
@@ -14,26 +21,34 @@ class InventoryResource(Resource):
             parser.add_argument('search', type=str, location='args')
             args = parser.parse_args()
 
-            query = Inventory.query
+            stream = wants_stream()
+            if not stream and not any(args.values()):
+                # The unfiltered catalog is reference data; serve it from the cache.
+                return cache.cached_json(INVENTORY_CATALOG_KEY, self._load_catalog)
+
+            stmt = inventory_serializer.select()
 
             if args.get('property_id'):
-                query = query.filter_by(property_id=args['property_id'])
-            if args.get('item_name'):
-                query = query.filter(Inventory.item_name.ilike(f"%{args['item_name']}%"))
-            if args.get('search'):
-                search_term = f"%{args['search']}%"
-                query = query.filter(Inventory.item_name.ilike(search_term))
-
-            inventory_items = query.all()
-            inventory_data = [
-                item.to_dict(rules=("-inventory_users", "-property"))
-                for item in inventory_items
-            ]
+                stmt = stmt.where(Inventory.property_id == args['property_id'])
+            # item_name and search are the same substring filter; apply each
+            # distinct term once.
+            for term in {args.get('item_name'), args.get('search')} - {None, ''}:
+                stmt = stmt.where(Inventory.item_name.ilike(f"%{term}%"))
+
+            if stream:
+                return stream_rows(db.session, stmt.order_by(Inventory.id), inventory_serializer)
+            rows = db.session.execute(stmt).all()
+            inventory_data = inventory_serializer.rows(rows)
             return {"inventory": inventory_data}, 200
         except Exception as e:
             current_app.logger.error(f"Error fetching inventory: {str(e)}")
             return {"message": "Internal server error"}, 500
 
+    @staticmethod
+    def _load_catalog():
+        rows = db.session.execute(inventory_serializer.select()).all()
+        return {"inventory": inventory_serializer.rows(rows)}
+
     @jwt_required()
     def post(self):
         user_id = get_jwt_identity()
@@ -41,16 +56,22 @@ class InventoryResource(Resource):
         parser.add_argument('item_name', type=str, required=True, help="Item name cannot be blank")
         parser.add_argument('image', type=str, required=False)
         parser.add_argument('property_id', type=int, required=True, help="Property ID is required")
+        parser.add_argument('volume_m3', type=float, required=False)
+        parser.add_argument('weight_kg', type=float, required=False)
         args = parser.parse_args()
 
         try:
             new_item = Inventory(
                 item_name=args['item_name'],
                 image=args.get('image'),
-                property_id=args['property_id']
+                property_id=args['property_id'],
+                volume_m3=args.get('volume_m3'),
+                weight_kg=args.get('weight_kg')
             )
             db.session.add(new_item)
             db.session.commit()
+            cache.invalidate(INVENTORY_CATALOG_KEY)
+            catalog_search.invalidate()
             return {
                 "message": "Inventory item added successfully",
                 "inventory": new_item.to_dict(rules=("-inventory_users", "-property"))
@@ -59,9 +80,30 @@ class InventoryResource(Resource):
             current_app.logger.error(f"Error adding inventory item: {str(e)}")
             return {"message": "Internal server error"}, 500
 
+# Inventory Search Resource (typeahead over the catalog)
+class InventorySearchResource(Resource):
+    @jwt_required()
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', type=str, location='args', required=True, help="Search query is required")
+        parser.add_argument('limit', type=int, location='args')
+        parser.add_argument('property_id', type=int, location='args')
+        args = parser.parse_args()
+
+        limit = args.get('limit') or DEFAULT_RESULTS
+        if limit < 1:
+            limit = DEFAULT_RESULTS
+        try:
+            results = catalog_search.search(args['q'], min(limit, MAX_RESULTS), args.get('property_id'))
+            return {"results": results}, 200
+        except Exception as e:
+            current_app.logger.error(f"Error searching inventory: {str(e)}")
+            return {"message": "Internal server error"}, 500
+
 # Inventory Item Resource (GET, PUT, DELETE single item)
 class InventoryItemResource(Resource):
     @jwt_required()
+    @conditional(Inventory, scope=lambda inventory_id: [Inventory.id == inventory_id])
     def get(self, inventory_id):
         try:
             item = Inventory.query.get_or_404(inventory_id)
@@ -76,6 +118,8 @@ class InventoryItemResource(Resource):
         parser.add_argument('item_name', type=str)
         parser.add_argument('image', type=str)
         parser.add_argument('property_id', type=int)
+        parser.add_argument('volume_m3', type=float)
+        parser.add_argument('weight_kg', type=float)
         args = parser.parse_args()
 
         try:
@@ -86,7 +130,13 @@ class InventoryItemResource(Resource):
                 item.image = args['image']
             if args.get('property_id'):
                 item.property_id = args['property_id']
+            if args.get('volume_m3') is not None:
+                item.volume_m3 = args['volume_m3']
+            if args.get('weight_kg') is not None:
+                item.weight_kg = args['weight_kg']
             db.session.commit()
+            cache.invalidate(INVENTORY_CATALOG_KEY)
+            catalog_search.invalidate()
             return {
                 "message": "Inventory item updated successfully",
                 "inventory": item.to_dict(rules=("-inventory_users", "-property"))
@@ -101,6 +151,8 @@ class InventoryItemResource(Resource):
             item = Inventory.query.get_or_404(inventory_id)
             db.session.delete(item)
             db.session.commit()
+            cache.invalidate(INVENTORY_CATALOG_KEY)
+            catalog_search.invalidate()
             return {"message": "Inventory item deleted successfully"}, 200
         except Exception as e:
             current_app.logger.error(f"Error deleting inventory item {inventory_id}: {str(e)}")
@@ -182,4 +234,160 @@ class PatchUserInventoryResource(Resource):
             current_app.logger.error(f"Error updating inventory record {inventory_user_id}: {str(e)}")
             return {"message": "Internal server error"}, 500
 
+# Batch add/update/delete of User Inventory Records
+class BatchUserInventoryResource(Resource):
+    MAX_OPERATIONS = 1000
+    FIELDS = ('quantity', 'condition', 'priority')
+
+    @jwt_required()
+    def post(self):
+        user_id = int(get_jwt_identity())
+        parser = reqparse.RequestParser()
+        parser.add_argument('operations', type=dict, action='append', location='json', required=True,
+                            help="A list of operations is required")
+        operations = parser.parse_args()['operations']
+        if len(operations) > self.MAX_OPERATIONS:
+            return {"message": f"At most {self.MAX_OPERATIONS} operations per batch"}, 400
+
+        results = [None] * len(operations)
+        adds, updates, deletes = [], [], []
+        seen_ids = set()
+        for index, operation in enumerate(operations):
+            op = operation.get('op')
+            error = self._validate(op, operation, seen_ids)
+            if error:
+                results[index] = {"index": index, "op": op, "status": 400, "message": error}
+            elif op == 'add':
+                adds.append(index)
+            elif op == 'update':
+                updates.append(index)
+            else:
+                deletes.append(index)
+
+        try:
+            # One lookup each for ownership and catalog membership instead of a
+            # SELECT per record.
+            record_ids = [operations[i]['id'] for i in updates + deletes]
+            owned = set(db.session.execute(
+                db.select(InventoryUser.id).where(InventoryUser.user_id == user_id, InventoryUser.id.in_(record_ids))
+            ).scalars()) if record_ids else set()
+            inventory_ids = {operations[i]['inventory_id'] for i in adds}
+            known = set(db.session.execute(
+                db.select(Inventory.id).where(Inventory.id.in_(inventory_ids))
+            ).scalars()) if inventory_ids else set()
+
+            adds = self._keep(adds, lambda i: operations[i]['inventory_id'] in known,
+                              operations, results, "Inventory item not found")
+            updates = self._keep(updates, lambda i: operations[i]['id'] in owned,
+                                 operations, results, "Inventory record not found")
+            deletes = self._keep(deletes, lambda i: operations[i]['id'] in owned,
+                                 operations, results, "Inventory record not found")
+
+            if adds:
+                # Adding an item the user already has bumps its quantity. Adds
+                # of one item within the batch are merged first: an upsert
+                # may not touch the same row twice.
+                rows = {}
+                for i in adds:
+                    operation = operations[i]
+                    row = rows.get(operation['inventory_id'])
+                    if row is None:
+                        row = rows[operation['inventory_id']] = {
+                            "user_id": user_id, "inventory_id": operation['inventory_id'],
+                            "quantity": 0, "condition": None, "priority": None,
+                        }
+                    row["quantity"] += operation.get('quantity', 1)
+                    for field in ('condition', 'priority'):
+                        if operation.get(field) is not None:
+                            row[field] = operation[field]
+                existing = set(db.session.execute(
+                    db.select(InventoryUser.inventory_id)
+                    .where(InventoryUser.user_id == user_id, InventoryUser.inventory_id.in_(rows))
+                ).scalars())
+                upserted = {
+                    inventory_id: (record_id, quantity)
+                    for record_id, inventory_id, quantity in db.session.execute(self._upsert(list(rows.values())))
+                }
+                for i in adds:
+                    inventory_id = operations[i]['inventory_id']
+                    record_id, quantity = upserted[inventory_id]
+                    results[i] = {"index": i, "op": "add", "status": 200 if inventory_id in existing else 201,
+                                  "id": record_id, "quantity": quantity}
+
+            if updates:
+                # executemany UPDATE keyed on primary key; rows with the same
+                # set of fields share one statement.
+                db.session.execute(db.update(InventoryUser), [
+                    {"id": operations[i]['id'],
+                     **{field: operations[i][field] for field in self.FIELDS if field in operations[i]}}
+                    for i in updates
+                ])
+                for i in updates:
+                    results[i] = {"index": i, "op": "update", "status": 200, "id": operations[i]['id']}
+
+            if deletes:
+                delete_ids = [operations[i]['id'] for i in deletes]
+                db.session.execute(
+                    db.delete(InventoryUser).where(InventoryUser.user_id == user_id, InventoryUser.id.in_(delete_ids))
+                )
+                for i in deletes:
+                    results[i] = {"index": i, "op": "delete", "status": 200, "id": operations[i]['id']}
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error applying inventory batch for user {user_id}: {str(e)}")
+            return {"message": "Internal server error"}, 500
+
+        succeeded = sum(1 for result in results if result["status"] < 300)
+        return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}, 200
+
+    def _validate(self, op, operation, seen_ids):
+        if op not in ('add', 'update', 'delete'):
+            return "op must be one of add, update, delete"
+        if op == 'add':
+            if not isinstance(operation.get('inventory_id'), int):
+                return "inventory_id is required"
+        else:
+            record_id = operation.get('id')
+            if not isinstance(record_id, int):
+                return "id is required"
+            if record_id in seen_ids:
+                return "Record appears more than once in this batch"
+            seen_ids.add(record_id)
+            if op == 'update' and not any(field in operation for field in self.FIELDS):
+                return "Nothing to update"
+        if 'quantity' in operation and not isinstance(operation['quantity'], int):
+            return "quantity must be an integer"
+        for field in ('condition', 'priority'):
+            if operation.get(field) is not None and not isinstance(operation[field], str):
+                return f"{field} must be a string"
+        return None
+
+    @staticmethod
+    def _upsert(rows):
+        # One multi-row INSERT ... ON CONFLICT DO UPDATE ... RETURNING. Rows are
+        # matched back by inventory_id, unique within the statement, so
+        # RETURNING needs no particular order.
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(InventoryUser).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[InventoryUser.user_id, InventoryUser.inventory_id],
+            set_={
+                "quantity": db.func.coalesce(InventoryUser.quantity, 1) + stmt.excluded.quantity,
+                "condition": db.func.coalesce(stmt.excluded.condition, InventoryUser.condition),
+                "priority": db.func.coalesce(stmt.excluded.priority, InventoryUser.priority),
+                "updated_at": db.func.now(),
+            },
+        ).returning(InventoryUser.id, InventoryUser.inventory_id, InventoryUser.quantity)
 
+    @staticmethod
+    def _keep(indexes, predicate, operations, results, message):
+        kept = []
+        for i in indexes:
+            if predicate(i):
+                kept.append(i)
+            else:
+                results[i] = {"index": i, "op": operations[i]['op'], "status": 404, "message": message}
+        return kept
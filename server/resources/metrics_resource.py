@@ -0,0 +1,38 @@
+import hmac
+from functools import wraps
+from flask import current_app, request
+from flask_restful import Resource
+from profiling import profiler
+from metrics import metrics_response
+
+
+def metrics_token_required(fn):
+    # Metrics expose endpoint names, statements and query plans. They are
+    # served only when METRICS_TOKEN is set, to scrapers sending it as a
+    # bearer token; without one the routes don't exist.
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('METRICS_TOKEN')
+        if not token:
+            return {"message": "Not found"}, 404
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+            return {"message": "Unauthorized"}, 401, {"WWW-Authenticate": "Bearer"}
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+class MetricsResource(Resource):
+    method_decorators = [metrics_token_required]
+
+    # Prometheus text exposition format.
+    def get(self):
+        return metrics_response()
+
+
+class SQLMetricsResource(Resource):
+    method_decorators = [metrics_token_required]
+
+    # Per-endpoint SQL totals, recent slow queries and N+1 suspects.
+    def get(self):
+        return profiler.snapshot(), 200
@@ -1,8 +1,83 @@
 import datetime
-from flask import current_app
+from flask import current_app, request
 from flask_restful import Resource, reqparse
-from models import db, Move
+from sqlalchemy.orm import selectinload
+from models import db, Move, Quote, move_serializer, quote_serializer, mover_summary_serializer
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from pagination import clamp_limit, keyset_page, keyset_page_async, page_stmt
+from streaming import wants_stream, stream_rows
+from conditional import conditional
+from pricing import RateCard, estimate_move_price
+from matching import refresh_move_candidates
+from geocoding import geocode_moves
+from database import read_replica
+from async_db import async_db
+
+def refresh_candidates(move_id):
+    # Matching is best-effort: a failure here must not fail the write.
+    try:
+        refresh_move_candidates([move_id])
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error refreshing candidates for move {move_id}: {str(e)}")
+
+
+MOVE_FIELDS = (
+    'id', 'user_id', 'from_address', 'to_address', 'move_date', 'move_time', 'move_status',
+    'estimated_price', 'approved_price', 'distance', 'created_at', 'updated_at',
+)
+
+
+def move_fields(move):
+    # Plain column values, without relationships (which would recurse). The
+    # JSON provider writes the dates and times as ISO 8601.
+    return {field: getattr(move, field) for field in MOVE_FIELDS}
+
+
+# Query-string arguments shared by the paginated move listings.
+def list_parser():
+    parser = reqparse.RequestParser()
+    parser.add_argument('limit', type=int, location='args')
+    parser.add_argument('cursor', type=str, location='args')
+    parser.add_argument('move_status', type=str, location='args')
+    parser.add_argument('move_date_from', type=str, location='args', help="Expected format: YYYY-MM-DD")
+    parser.add_argument('move_date_to', type=str, location='args', help="Expected format: YYYY-MM-DD")
+    return parser
+
+def apply_move_filters(stmt, args):
+    if args.get('move_status'):
+        stmt = stmt.where(Move.move_status == args['move_status'])
+    if args.get('move_date_from'):
+        move_date_from = datetime.datetime.strptime(args['move_date_from'], "%Y-%m-%d")
+        stmt = stmt.where(Move.move_date >= move_date_from)
+    if args.get('move_date_to'):
+        # Inclusive of the whole end day.
+        move_date_to = datetime.datetime.strptime(args['move_date_to'], "%Y-%m-%d") + datetime.timedelta(days=1)
+        stmt = stmt.where(Move.move_date < move_date_to)
+    return stmt
+
+def all_moves_parser():
+    parser = list_parser()
+    parser.add_argument('user_id', type=int, location='args')
+    return parser
+
+
+def listed_page(*criteria, parser=list_parser):
+    # @conditional scope for the move listings: the page the request will
+    # return, so the validator reads at most one page of rows. None when the
+    # whole result is streamed, or for a bad cursor or date, which the
+    # handler reports itself.
+    if wants_stream():
+        return None
+    args = parser().parse_args()
+    if args.get('user_id'):
+        criteria += (Move.user_id == args['user_id'],)
+    try:
+        stmt = apply_move_filters(db.select(Move.id, Move.updated_at).where(*criteria), args)
+        return page_stmt(stmt, Move.created_at, Move.id, clamp_limit(args.get('limit')), args.get('cursor'))
+    except ValueError:
+        return None
+
 
 class MovesResource(Resource):
     @jwt_required()
@@ -13,7 +88,6 @@ class MovesResource(Resource):
         parser.add_argument('to_address', type=str, required=True, help="To address is required")
         parser.add_argument('move_date', type=str, required=True, help="Move date is required in YYYY-MM-DD format")
         parser.add_argument('move_time', type=str, required=True, help="Move time is required in HH:MM:SS format")
-        parser.add_argument('estimated_price', type=float, required=False)
         parser.add_argument('approved_price', type=float, required=False)
         parser.add_argument('distance', type=float, required=False)
         args = parser.parse_args()
@@ -32,64 +106,72 @@ class MovesResource(Resource):
                 to_address=args['to_address'],
                 move_date=move_date,
                 move_time=move_time,
-                estimated_price=args.get('estimated_price'),
-                approved_price=args.get('approved_price'),
-                distance=args.get('distance')
+                approved_price=args.get('approved_price')
             )
+            # Distance comes from the geocoded addresses; the client's value is
+            # only used when an address isn't located yet. New addresses are
+            # looked up by the geocoding backfill job, not in the request.
+            geocode_moves([move], [args.get('distance')], fetch=False)
+            # The estimate is computed server-side from the user's inventory.
+            move.estimated_price = estimate_move_price(RateCard.from_config(current_app.config), user_id, move.distance)
             db.session.add(move)
             db.session.commit()
-            # Manually build a response dict to avoid recursion.
-            move_data = {
-                "id": move.id,
-                "user_id": move.user_id,
-                "from_address": move.from_address,
-                "to_address": move.to_address,
-                "move_date": move.move_date.isoformat(),
-                "move_time": move.move_time.isoformat(),
-                "move_status": move.move_status,
-                "estimated_price": move.estimated_price,
-                "approved_price": move.approved_price,
-                "distance": move.distance,
-                "created_at": move.created_at.isoformat() if move.created_at else None,
-                "updated_at": move.updated_at.isoformat() if move.updated_at else None,
-            }
+            move_data = move_fields(move)
+            refresh_candidates(move.id)
             return {"message": "Move created successfully", "move": move_data}, 201
         except Exception as e:
             current_app.logger.error(f"Error creating move: {str(e)}")
             return {"message": "Internal server error"}, 500
 
     @jwt_required()
+    @read_replica
+    @conditional(Move, scope=lambda: listed_page(parser=all_moves_parser))
     def get(self):
+        args = all_moves_parser().parse_args()
         try:
-            moves = Move.query.all()
-            moves_data = [
-                move.to_dict(rules=("-bookings", "-quotes", "-user"))
-                for move in moves
-            ]
-            return {"moves": moves_data}, 200
+            stmt = move_serializer.select()
+            if args.get('user_id'):
+                stmt = stmt.where(Move.user_id == args['user_id'])
+            stmt = apply_move_filters(stmt, args)
+            if wants_stream():
+                # Stream every matching move instead of a single page.
+                return stream_rows(db.session, stmt.order_by(Move.created_at.desc(), Move.id.desc()), move_serializer)
+            page = (stmt, Move.created_at, Move.id, clamp_limit(args.get('limit')), args.get('cursor'))
+            if async_db.serving:
+                rows, next_cursor = async_db.run(keyset_page_async, *page)
+            else:
+                rows, next_cursor = keyset_page(db.session, *page)
+            moves_data = move_serializer.rows(rows)
+            return {"moves": moves_data, "next_cursor": next_cursor}, 200
+        except ValueError:
+            return {"message": "Invalid cursor or date filter. Expected YYYY-MM-DD for dates."}, 400
         except Exception as e:
             current_app.logger.error(f"Error fetching moves: {str(e)}")
             return {"message": "Internal server error"}, 500
 
 class MoveResource(Resource):
     @jwt_required()
+    @conditional(Move, scope=lambda: listed_page(Move.user_id == get_jwt_identity()))
     def get(self):
         user_id = get_jwt_identity()
+        args = list_parser().parse_args()
         try:
-            # Retrieve all moves for the current user.
-            moves = Move.query.filter_by(user_id=user_id).all()
-            # Serialize moves while excluding relationships that may cause recursion.
-            moves_data = [
-                move.to_dict(rules=("-bookings", "-quotes", "-user"))
-                for move in moves
-            ]
-            return {"moves": moves_data}, 200
+            # Retrieve a page of moves for the current user.
+            stmt = apply_move_filters(move_serializer.select().where(Move.user_id == user_id), args)
+            rows, next_cursor = keyset_page(
+                db.session, stmt, Move.created_at, Move.id, clamp_limit(args.get('limit')), args.get('cursor')
+            )
+            moves_data = move_serializer.rows(rows)
+            return {"moves": moves_data, "next_cursor": next_cursor}, 200
+        except ValueError:
+            return {"message": "Invalid cursor or date filter. Expected YYYY-MM-DD for dates."}, 400
         except Exception as e:
             current_app.logger.error(f"Error fetching moves for user {user_id}: {str(e)}")
             return {"message": "Internal server error"}, 500
 
 class SingleMove(Resource):
     @jwt_required()
+    @conditional(Move, scope=lambda move_id: [Move.id == move_id, Move.user_id == get_jwt_identity()])
     def get(self, move_id):
         user_id = get_jwt_identity()
         try:
@@ -107,6 +189,7 @@ class SingleMove(Resource):
 
 class SingleMoveResource(Resource):
     @jwt_required()
+    @conditional(Move, scope=lambda move_id: [Move.id == move_id])
     def get(self, move_id):
         try:
             # Fetch the specific move that belongs to the current user.
@@ -130,7 +213,6 @@ class MovePatchResource(Resource):
         parser.add_argument('to_address', type=str, required=False)
         parser.add_argument('move_date', type=str, required=False, help="Expected format: YYYY-MM-DD")
         parser.add_argument('move_time', type=str, required=False, help="Expected format: HH:MM:SS")
-        parser.add_argument('estimated_price', type=float, required=False)
         parser.add_argument('approved_price', type=float, required=False)
         parser.add_argument('distance', type=float, required=False)
         parser.add_argument('move_status', type=str, required=False)
@@ -142,10 +224,15 @@ class MovePatchResource(Resource):
             return {"message": "Move not found"}, 404
 
         # Update fields if provided in the payload.
+        previous_distance = move.distance
         if args.get('from_address') is not None:
             move.from_address = args['from_address']
         if args.get('to_address') is not None:
             move.to_address = args['to_address']
+        if args.get('from_address') is not None or args.get('to_address') is not None:
+            geocode_moves([move], [args.get('distance')], fetch=False)
+        elif args.get('distance') is not None and (move.from_lat is None or move.to_lat is None):
+            move.distance = args['distance']
         if args.get('move_date') is not None:
             try:
                 move.move_date = datetime.datetime.strptime(args['move_date'], "%Y-%m-%d")
@@ -156,34 +243,61 @@ class MovePatchResource(Resource):
                 move.move_time = datetime.datetime.strptime(args['move_time'], "%H:%M:%S").time()
             except Exception:
                 return {"message": "Invalid time format. Expected HH:MM:SS"}, 400
-        if args.get('estimated_price') is not None:
-            move.estimated_price = args['estimated_price']
         if args.get('approved_price') is not None:
             move.approved_price = args['approved_price']
-        if args.get('distance') is not None:
-            move.distance = args['distance']
+        if move.distance != previous_distance:
+            move.estimated_price = estimate_move_price(RateCard.from_config(current_app.config), move.user_id, move.distance)
         if args.get('move_status') is not None:
             move.move_status = args['move_status']
 
         try:
             db.session.commit()
-            # Build a response dictionary to avoid recursive relationship issues.
-            move_data = {
-                "id": move.id,
-                "user_id": move.user_id,
-                "from_address": move.from_address,
-                "to_address": move.to_address,
-                "move_date": move.move_date.isoformat(),
-                "move_time": move.move_time.isoformat(),
-                "move_status": move.move_status,
-                "estimated_price": move.estimated_price,
-                "approved_price": move.approved_price,
-                "distance": move.distance,
-                "created_at": move.created_at.isoformat() if move.created_at else None,
-                "updated_at": move.updated_at.isoformat() if move.updated_at else None,
-            }
+            move_data = move_fields(move)
+            refresh_candidates(move.id)
             return {"message": "Move updated successfully", "move": move_data}, 200
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error updating move: {e}")
             return {"message": "Internal server error"}, 500
+
+
+class MoveDetailResource(Resource):
+    # Move, its quotes and a summary of each quoting mover in one response.
+    # Sparse fieldsets trim the payload: ?fields[move]=id,move_status&fields[quote]=id,quote_amount&fields[mover]=company_name
+    @jwt_required()
+    def get(self, move_id):
+        try:
+            move_fields = self._serializer(move_serializer, 'move')
+            quote_fields = self._serializer(quote_serializer, 'quote')
+            mover_fields = self._serializer(mover_summary_serializer, 'mover')
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        try:
+            # Two statements however many quotes there are: the move, then its
+            # quotes joined to their movers.
+            move = db.session.execute(
+                db.select(Move)
+                .where(Move.id == move_id)
+                .options(selectinload(Move.quotes).joinedload(Quote.mover))
+            ).scalar_one_or_none()
+            if not move:
+                return {"message": "Move not found"}, 404
+
+            move_data = move_fields.encode_object(move)
+            move_data["quotes"] = []
+            for quote in move.quotes:
+                quote_data = quote_fields.encode_object(quote)
+                quote_data["mover"] = mover_fields.encode_object(quote.mover)
+                move_data["quotes"].append(quote_data)
+            return {"move": move_data}, 200
+        except Exception as e:
+            current_app.logger.error(f"Error fetching move detail {move_id}: {str(e)}")
+            return {"message": "Internal server error"}, 500
+
+    @staticmethod
+    def _serializer(serializer, name):
+        fields = request.args.get(f"fields[{name}]")
+        if not fields:
+            return serializer
+        return serializer.subset(field.strip() for field in fields.split(',') if field.strip())
@@ -1,7 +1,11 @@
 from flask import current_app
 from flask_restful import Resource, reqparse
-from models import db, Mover, User
+from models import db, Mover, User, mover_serializer, move_serializer
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import cache, MOVERS_KEY
+from conditional import conditional
+from pagination import clamp_limit
+from matching import top_candidates
 
 class MoverResource(Resource):
     # @jwt_required()
@@ -28,6 +32,7 @@ class MoverResource(Resource):
             )
             db.session.add(mover)
             db.session.commit()
+            cache.invalidate(MOVERS_KEY)
 
             return mover.to_dict(), 201
 
@@ -39,18 +44,17 @@ class MoverResource(Resource):
     @jwt_required()
     def get(self):
         try:
-            # Query all mover records
-            movers = Mover.query.all()
-            # Serialize movers while excluding recursive relationships
-            movers_data = [
-                mover.to_dict(rules=("-quotes", "-bookings", "-reviews", "-users"))
-                for mover in movers
-            ]
-            return {"movers": movers_data}, 200
+            return cache.cached_json(MOVERS_KEY, self._load)
         except Exception as e:
             current_app.logger.error(f"Error fetching movers: {str(e)}")
             return {"message": "Internal server error"}, 500
 
+    @staticmethod
+    def _load():
+        # Query all mover records as plain column rows
+        rows = db.session.execute(mover_serializer.select()).all()
+        return {"movers": mover_serializer.rows(rows)}
+
 
 class SingleMover(Resource):
     @jwt_required()
@@ -81,6 +85,7 @@ class SingleMover(Resource):
 
 class MoverById(Resource):
     @jwt_required()
+    @conditional(Mover, scope=lambda mover_id: [Mover.id == mover_id])
     def get(self, mover_id):
         try:
             # Retrieve the mover based on the provided mover_id
@@ -93,4 +98,30 @@ class MoverById(Resource):
 
         except Exception as e:
             current_app.logger.error(f"Error fetching mover with id {mover_id}: {str(e)}")
-            return {"message": "Internal server error"}, 500
\ No newline at end of file
+            return {"message": "Internal server error"}, 500
+
+class MoverMatchesResource(Resource):
+    # Ranked open moves for the logged in user's mover company.
+    @jwt_required()
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument('limit', type=int, location='args')
+        args = parser.parse_args()
+
+        try:
+            user = db.session.get(User, get_jwt_identity())
+            if not user:
+                return {"message": "User not found"}, 404
+            if not user.mover_id:
+                return {"message": "No mover associated with this user"}, 404
+
+            matches = []
+            for score, move in top_candidates(user.mover_id, clamp_limit(args.get('limit'))):
+                match = move_serializer.encode_object(move)
+                match["match_score"] = score
+                matches.append(match)
+            return {"matches": matches}, 200
+
+        except Exception as e:
+            current_app.logger.error(f"Error fetching matches for user {get_jwt_identity()}: {str(e)}")
+            return {"message": "Internal server error"}, 500
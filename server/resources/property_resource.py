@@ -1,20 +1,21 @@
 from flask import current_app
 from flask_restful import Resource
-from models import db, Property
+from models import db, property_serializer
 from flask_jwt_extended import jwt_required
+from cache import cache, PROPERTIES_KEY
 
 class PropertyResource(Resource):
     @jwt_required()
     def get(self):
         try:
-            # Query all properties
-            properties = Property.query.all()
-            # Serialize each property to a dictionary, excluding inventory_items to avoid recursion
-            properties_data = [
-                prop.to_dict(rules=("-inventory_items",))
-                for prop in properties
-            ]
-            return {"properties": properties_data}, 200
+            # Properties rarely change, so serve the encoded list from the cache.
+            return cache.cached_json(PROPERTIES_KEY, self._load)
         except Exception as e:
             current_app.logger.error(f"Error fetching properties: {str(e)}")
             return {"message": "Internal server error"}, 500
+
+    @staticmethod
+    def _load():
+        # Query all properties as plain column rows
+        rows = db.session.execute(property_serializer.select()).all()
+        return {"properties": property_serializer.rows(rows)}
@@ -1,7 +1,14 @@
 from flask import current_app
 from flask_restful import Resource, reqparse
-from models import db, Quote, User, Move
+from models import db, Quote, User, Move, quote_serializer
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from conditional import conditional
+from database import read_replica
+
+def current_mover_quotes():
+    # Quotes of the mover the current user belongs to.
+    mover_id = db.select(User.mover_id).where(User.id == get_jwt_identity()).scalar_subquery()
+    return [Quote.mover_id == mover_id]
 
 class QuoteResource(Resource):
     @jwt_required()
@@ -45,6 +52,8 @@ class QuoteResource(Resource):
             return {'message': 'Failed to create quote'}, 500
 
     @jwt_required()
+    @read_replica
+    @conditional(Quote, scope=current_mover_quotes)
     def get(self):
         try:
             # Get the current user's ID from the JWT
@@ -56,14 +65,10 @@ class QuoteResource(Resource):
                 return {'message': 'User not found or not associated with a mover'}, 404
 
             # Retrieve all quotes for the mover associated with this user
-            quotes = Quote.query.filter_by(mover_id=user.mover_id).all()
-
-            # Serialize each quote (limiting to specific fields to avoid recursion issues)
-            quotes_list = [
-                quote.to_dict(only=[
-                    'id', 'mover_id', 'move_id', 'quote_amount', 'details', 'created_at', 'updated_at'
-                ]) for quote in quotes
-            ]
+            rows = db.session.execute(
+                quote_serializer.select().where(Quote.mover_id == user.mover_id)
+            ).all()
+            quotes_list = quote_serializer.rows(rows)
 
             return {'quotes': quotes_list}, 200
         except Exception as e:
@@ -72,6 +77,7 @@ class QuoteResource(Resource):
 
 class MoveQuotesResource(Resource):
     @jwt_required()
+    @conditional(Quote, scope=lambda move_id: [Quote.move_id == move_id])
     def get(self, move_id):
         try:
             # Ensure the move exists
@@ -80,14 +86,10 @@ class MoveQuotesResource(Resource):
                 return {'message': 'Move not found'}, 404
 
             # Retrieve all quotes for the specified move
-            quotes = Quote.query.filter_by(move_id=move_id).all()
-
-            # Serialize the quotes with selected fields
-            quotes_list = [
-                quote.to_dict(only=[
-                    'id', 'mover_id', 'move_id', 'quote_amount', 'details', 'created_at', 'updated_at'
-                ]) for quote in quotes
-            ]
+            rows = db.session.execute(
+                quote_serializer.select().where(Quote.move_id == move_id)
+            ).all()
+            quotes_list = quote_serializer.rows(rows)
 
             return {'quotes': quotes_list}, 200
         except Exception as e:
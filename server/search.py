@@ -0,0 +1,155 @@
+import bisect
+import re
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from models import db, Inventory, inventory_serializer
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+DEFAULT_RESULTS = 10
+MAX_RESULTS = 50
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class CatalogIndex:
+    """In-memory prefix index over inventory item names.
+
+    Every (word, item) pair of the catalog is kept in one array sorted by
+    word. The items whose words start with a prefix are then one contiguous
+    slice, found with two binary searches. Each pair also carries a
+    precomputed int64 rank key. Lower is better:
+    - the word's position in the name, so a name that starts with the prefix wins
+    - then shorter names
+    - then alphabetical order
+    Ranking is a NumPy partial sort of that slice.
+    """
+
+    def __init__(self, ids, names, property_ids, documents):
+        self.documents = documents
+        self.property_ids = np.asarray(property_ids, dtype=np.int64)
+
+        alphabetical = np.empty(len(names), dtype=np.int64)
+        alphabetical[sorted(range(len(names)), key=lambda i: (names[i].lower(), ids[i]))] = np.arange(len(names))
+        lengths = np.array([len(name) for name in names], dtype=np.int64)
+
+        pairs = sorted(
+            (token, i, position)
+            for i, name in enumerate(names)
+            for position, token in enumerate(tokenize(name))
+        )
+        self.tokens = [pair[0] for pair in pairs]
+        self.items = np.array([pair[1] for pair in pairs], dtype=np.int64)
+        positions = np.array([pair[2] for pair in pairs], dtype=np.int64)
+        self.keys = (
+            (np.minimum(positions, 1023) << 44)
+            | (np.minimum(lengths[self.items], (1 << 20) - 1) << 24)
+            | alphabetical[self.items]
+        )
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _range(self, prefix):
+        # Tokens are [a-z0-9]; '\x7f' sorts after all of them.
+        return bisect.bisect_left(self.tokens, prefix), bisect.bisect_left(self.tokens, prefix + '\x7f')
+
+    def search(self, query, limit=DEFAULT_RESULTS, property_id=None):
+        words = tokenize(query)
+        if not words:
+            return []
+        lo, hi = self._range(words[0])
+        items, keys = self.items[lo:hi], self.keys[lo:hi]
+
+        # Every further word must also prefix-match a word of the same item.
+        mask = self.property_ids[items] == property_id if property_id is not None else None
+        for word in words[1:]:
+            lo, hi = self._range(word)
+            matched = np.isin(items, self.items[lo:hi])
+            mask = matched if mask is None else mask & matched
+        if mask is not None:
+            items, keys = items[mask], keys[mask]
+        return [self.documents[i] for i in self._top(items, keys, limit)]
+
+    @staticmethod
+    def _top(items, keys, limit):
+        # An item appears once per matching word, so rank a window a few
+        # times larger than `limit` and keep each item's best entry.
+        window = limit * 4
+        if len(keys) > window:
+            order = np.argpartition(keys, window)[:window]
+            order = order[np.argsort(keys[order], kind='stable')]
+        else:
+            order = np.argsort(keys, kind='stable')
+        ranked = items[order]
+        _, first = np.unique(ranked, return_index=True)
+        ranked = ranked[np.sort(first)]
+        if len(ranked) < limit and len(keys) > window:
+            ranked = items[np.argsort(keys, kind='stable')]
+            _, first = np.unique(ranked, return_index=True)
+            ranked = ranked[np.sort(first)]
+        return ranked[:limit].tolist()
+
+
+class CatalogSearch:
+    """Per-process CatalogIndex that follows catalog changes.
+
+    The count and max(updated_at) of the inventory table identify a catalog
+    version. They are checked at most every `refresh_seconds`, or on the
+    next search after invalidate(). A change triggers a rebuild. While one
+    request rebuilds, concurrent searches keep using the previous index.
+    """
+
+    def __init__(self, refresh_seconds=5.0):
+        self.refresh_seconds = refresh_seconds
+        self.index = None
+        self.signature = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('SEARCH_REFRESH_SECONDS', self.refresh_seconds)
+
+    def invalidate(self):
+        self.checked_at = 0.0
+
+    def _signature(self):
+        return tuple(db.session.execute(
+            db.select(func.count(), func.max(Inventory.updated_at), func.max(Inventory.id))
+        ).one())
+
+    @staticmethod
+    def build():
+        rows = db.session.execute(inventory_serializer.select().order_by(Inventory.id)).all()
+        documents = inventory_serializer.rows(rows)
+        return CatalogIndex(
+            [doc['id'] for doc in documents],
+            [doc['item_name'] for doc in documents],
+            [doc['property_id'] for doc in documents],
+            documents,
+        )
+
+    def current(self):
+        if self.index is not None and time.monotonic() - self.checked_at < self.refresh_seconds:
+            return self.index
+        if not self._lock.acquire(blocking=self.index is None):
+            return self.index
+        try:
+            if self.index is None or time.monotonic() - self.checked_at >= self.refresh_seconds:
+                signature = self._signature()
+                if self.index is None or signature != self.signature:
+                    self.index = self.build()
+                    self.signature = signature
+                self.checked_at = time.monotonic()
+            return self.index
+        finally:
+            self._lock.release()
+
+    def search(self, query, limit=DEFAULT_RESULTS, property_id=None):
+        return self.current().search(query, limit, property_id)
+
+
+catalog_search = CatalogSearch()
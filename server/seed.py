@@ -1,9 +1,28 @@
-from app import app
+import argparse
+import csv
+import io
+import random
+from itertools import chain, islice
+from time import perf_counter
+from app import create_app
+from hashing import hashing
 from models import db, User, Mover, Property, Inventory, InventoryUser, Move, Booking, Review, Payment, Quote
-from datetime import datetime, time, timezone
+from datetime import datetime, time, timezone, timedelta
+
+# Every bulk-seeded user can log in with this password (used by benchmarks/loadtest.py).
+BULK_PASSWORD = 'loadtest-password'
+BULK_EMAIL = 'user{}@loadtest.example'
 
 
 def clear_tables():
+    if db.engine.dialect.name == 'postgresql':
+        # One statement, no per-row deletes; CASCADE also empties tables that
+        # reference these (move candidates) and ids restart at 1.
+        tables = ', '.join(model.__tablename__ for model in
+                           (Quote, Booking, Review, Payment, InventoryUser, Inventory, Property, Move, Mover, User))
+        db.session.execute(db.text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+        db.session.commit()
+        return
     # Clear tables in proper order; note that with circular dependencies, deletion order is critical.
     db.session.query(Quote).delete()
     db.session.query(Booking).delete()
@@ -261,7 +280,7 @@ def seed_payments():
 
 
 def seed_database():
-    with app.app_context():
+    with create_app().app_context():
         clear_tables()
         seed_users()
         seed_movers()
@@ -276,5 +295,326 @@ def seed_database():
         print("Database seeding complete!")
 
 
+# Bulk generators for benchmarks. Each yields plain column dicts with
+# pre-allocated ids and values already in their stored text form, so rows can
+# be streamed in fixed-size batches straight to the driver (COPY on
+# PostgreSQL) without building ORM objects or formatting dates per row.
+ITEM_NAMES = ['Sofa', 'Dining Table', 'Bed', 'Wardrobe', 'Desk', 'Bookshelf', 'Fridge', 'Cooker', 'Television',
+              'Mattress', 'Dresser', 'Armchair', 'Coffee Table', 'Microwave', 'Washing Machine', 'Mirror']
+ITEM_KINDS = ['Small', 'Large', 'Wooden', 'Glass', 'Leather', 'Metal', 'Folding', 'Corner', 'Double', 'Kids']
+AREAS = ['Westlands', 'Kilimani', 'Karen', 'Lavington', 'Kileleshwa', 'Parklands', 'South B', 'Runda',
+         'Embakasi', 'Ruaka', 'Syokimau', 'Langata', 'Upper Hill', 'Gigiri', 'Ngong Road', 'Thika Road']
+MOVE_STATUSES = ['Pending', 'Pending', 'Pending', 'Confirmed', 'Completed', 'Cancelled']
+
+
+def _timestamp(value):
+    # The same text SQLAlchemy stores for DateTime/Time on SQLite; PostgreSQL
+    # parses it as well.
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def _clock(value):
+    return value.strftime('%H:%M:%S.%f')
+
+
+def generate_users(count, password_hash, movers=0, rng=random):
+    # Ids are pre-allocated from 1; the first `movers` users own mover companies 1..movers.
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "name": f"Load User {i}",
+            "email": BULK_EMAIL.format(i),
+            "password": password_hash,
+            "phone": f"07{i:08d}"[-10:],
+            "location": f"{rng.choice(AREAS)} Nairobi",
+            "role": 'Company' if i <= movers else 'User',
+            "house_type": rng.choice(['Apartment', 'House', 'None']),
+            "is_verified": True,
+            "mover_id": i if i <= movers else None,
+        }
+
+
+def generate_movers(count, rng=random):
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "company_name": f"Load Movers {i}",
+            "email": f"contact{i}@movers.loadtest.example",
+            "phone": f"05{i:08d}"[-10:],
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "availability_status": rng.choice(['Available', 'Available', 'Available', 'Unavailable']),
+            "house_type": rng.choice(['Apartment', 'House', 'None']),
+        }
+
+
+def generate_inventory(count, properties, rng=random):
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "item_name": f"{rng.choice(ITEM_KINDS)} {rng.choice(ITEM_NAMES)} {i}",
+            "property_id": rng.randint(1, properties),
+            "volume_m3": round(rng.uniform(0.05, 3.0), 2),
+            "weight_kg": round(rng.uniform(1, 120), 1),
+        }
+
+
+def generate_inventory_users(count, users, inventory, rng=random):
+    # At most one row per (user, item): a user's k-th row takes the k-th item
+    # after a random starting point.
+    starts = [rng.randrange(inventory) for _ in range(users)]
+    conditions, priorities, random_ = ['New', 'Good', 'Fair'], ['High', 'Medium', 'Low'], rng.random
+    for i in range(min(count, users * inventory)):
+        user, k = i % users, i // users
+        yield {
+            "id": i + 1,
+            "user_id": user + 1,
+            "inventory_id": (starts[user] + k) % inventory + 1,
+            "quantity": int(random_() * 4) + 1,
+            "condition": conditions[int(random_() * 3)],
+            "priority": priorities[int(random_() * 3)],
+        }
+
+
+def _prices(low, high):
+    # Every amount between low and high to the cent, formatted once.
+    return [f"{cents / 100:.2f}" for cents in range(low * 100, high * 100 + 1)]
+
+
+def generate_moves(count, users, rng=random):
+    # Dates, times, addresses and amounts come from pre-formatted pools, picked
+    # by index: building and formatting them per row was most of the cost.
+    now = datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [_timestamp(today + timedelta(days=offset)) for offset in range(-365, 366)]
+    times = [_clock(time(hour, minute)) for hour in range(7, 19) for minute in (0, 15, 30, 45)]
+    created = [_timestamp(now - timedelta(minutes=offset)) for offset in range(0, 365 * 1440, 7)]
+    addresses = [f"{number} {area} Nairobi" for area in AREAS for number in range(1, 401)]
+    prices, distances = _prices(80, 1500), _prices(1, 60)
+    random_ = rng.random
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "user_id": int(random_() * users) + 1,
+            "from_address": addresses[int(random_() * len(addresses))],
+            "to_address": addresses[int(random_() * len(addresses))],
+            "move_date": days[int(random_() * len(days))],
+            "move_time": times[int(random_() * len(times))],
+            "move_status": MOVE_STATUSES[int(random_() * len(MOVE_STATUSES))],
+            "estimated_price": prices[int(random_() * len(prices))],
+            "distance": distances[int(random_() * len(distances))],
+            "created_at": created[int(random_() * len(created))],
+        }
+
+
+def generate_quotes(count, moves, movers, rng=random):
+    prices, random_ = _prices(80, 1500), rng.random
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "move_id": int(random_() * moves) + 1,
+            "mover_id": int(random_() * movers) + 1,
+            "quote_amount": prices[int(random_() * len(prices))],
+            "details": 'Load test quote',
+        }
+
+
+def _copy_defaults(table, columns, loaded_at):
+    # Rows bypass SQLAlchemy, so fill the Python-side column defaults the
+    # generator didn't supply; db.func.now() becomes the load timestamp.
+    defaults = {}
+    for column in table.columns:
+        if column.name in columns or column.default is None:
+            continue
+        if column.default.is_scalar:
+            defaults[column.name] = column.default.arg
+        elif column.default.is_clause_element:
+            defaults[column.name] = loaded_at
+    return defaults
+
+
+class _CSVStream:
+    """Read-only file over rows as CSV, formatted `batch_size` rows per read().
+
+    COPY pulls from it as it sends, so one COPY streams a whole table and the
+    server parses each batch while the next one is generated.
+    """
+
+    def __init__(self, rows, batch_size):
+        self.rows = rows
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def read(self, size=-1):
+        batch = list(islice(self.rows, self.batch_size))
+        if not batch:
+            return ''
+        self.count += len(batch)
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerows(batch)
+        return self._buffer.getvalue()
+
+
+def load_rows(model, rows, batch_size, skip_triggers=False):
+    """Stream generated rows into `model`'s table in batches of `batch_size`.
+
+    PostgreSQL (psycopg2) gets a single COPY FROM STDIN in CSV; other drivers
+    get a plain executemany per batch. Everything is loaded in one
+    transaction. With `skip_triggers` that transaction runs in replica mode,
+    so PostgreSQL skips the per-row foreign key checks. Returns the number of
+    rows inserted.
+    """
+    table = model.__table__
+    connection = db.session.connection()
+    if skip_triggers:
+        connection.execute(db.text("SET LOCAL session_replication_role = replica"))
+    first = next(rows, None)
+    if first is None:
+        db.session.commit()
+        return 0
+    defaults = _copy_defaults(table, first, _timestamp(datetime.now()))
+    names = [*first, *defaults]
+    columns = ', '.join(f'"{name}"' for name in names)
+    extra = tuple(defaults.values())
+    values = ((*row.values(), *extra) for row in chain([first], rows))
+    cursor = connection.connection.cursor()
+    if connection.dialect.driver == 'psycopg2':
+        stream = _CSVStream(values, batch_size)
+        cursor.copy_expert(f'COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)', stream)
+        inserted = stream.count
+    else:
+        marker = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+        statement = f'INSERT INTO {table.name} ({columns}) VALUES ({", ".join([marker] * len(names))})'
+        inserted = 0
+        while batch := list(islice(values, batch_size)):
+            cursor.executemany(statement, batch)
+            inserted += len(batch)
+    cursor.close()
+    db.session.commit()
+    return inserted
+
+
+def can_skip_triggers():
+    # Replica mode needs superuser; without it the foreign keys are checked as usual.
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return bool(db.session.execute(db.text(
+        "SELECT rolsuper FROM pg_roles WHERE rolname = current_user"
+    )).scalar())
+
+
+def drop_secondary_indexes(models):
+    """Drop the indexes on `models`' tables that no constraint depends on.
+
+    Building an index once over the loaded rows is much cheaper than updating
+    it on every insert. Returns their definitions for create_indexes().
+    Primary keys and unique constraints are kept.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    definitions = []
+    for model in models:
+        indexes = db.session.execute(db.text(
+            "SELECT CAST(i.indexrelid AS regclass), pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "WHERE i.indrelid = CAST(:table AS regclass) "
+            "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)"
+        ), {"table": model.__tablename__}).all()
+        for name, definition in indexes:
+            db.session.execute(db.text(f"DROP INDEX {name}"))
+            definitions.append(definition)
+    db.session.commit()
+    return definitions
+
+
+def create_indexes(definitions, models):
+    for definition in definitions:
+        db.session.execute(db.text(definition))
+    db.session.commit()
+    if db.engine.dialect.name == 'postgresql' and models:
+        # Fresh statistics, so the first queries don't plan against empty tables.
+        db.session.execute(db.text("ANALYZE " + ", ".join(model.__tablename__ for model in models)))
+        db.session.commit()
+
+
+def reset_sequences(models):
+    # Ids were written explicitly, so move each serial past the loaded rows.
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        ))
+    db.session.commit()
+
+
+def seed_bulk(users=1000, movers=50, inventory=2000, inventory_per_user=5, moves=10000, quotes=20000,
+              batch_size=5000, seed=42):
+    """Replace all data with generated rows at the given scale.
+
+    Generation is seeded, so the same arguments give the same dataset. Primary
+    keys are assigned up front, which lets every table reference the previous
+    ones without reading ids back. Rows are generated lazily and loaded with
+    COPY on PostgreSQL (executemany elsewhere).
+    """
+    rng = random.Random(seed)
+    movers = min(movers, users)
+    with create_app().app_context():
+        clear_tables()
+        started = perf_counter()
+        # One hash for everyone: hashing each user would dominate the run.
+        password_hash = hashing.generate_password_hash(BULK_PASSWORD)
+        models = [Mover, User, Property, Inventory, InventoryUser, Move, Quote]
+        # Every id referenced is generated alongside, so the foreign key
+        # triggers and index maintenance can wait until the data is in.
+        skip = can_skip_triggers()
+        indexes = drop_secondary_indexes(models)
+        counts = {}
+        try:
+            counts["movers"] = load_rows(Mover, generate_movers(movers, rng), batch_size, skip)
+            counts["users"] = load_rows(User, generate_users(users, password_hash, movers, rng), batch_size, skip)
+            counts["properties"] = load_rows(Property, iter([
+                {"id": 1, "property_type": 'Apartment'}, {"id": 2, "property_type": 'House'},
+            ]), batch_size, skip)
+            counts["inventory"] = load_rows(Inventory, generate_inventory(inventory, 2, rng), batch_size, skip)
+            counts["inventory_users"] = load_rows(
+                InventoryUser, generate_inventory_users(users * inventory_per_user, users, inventory, rng), batch_size,
+                skip)
+            counts["moves"] = load_rows(Move, generate_moves(moves, users, rng), batch_size, skip)
+            counts["quotes"] = load_rows(Quote, generate_quotes(quotes, moves, movers, rng), batch_size, skip)
+        finally:
+            # Even when a load fails or is interrupted: end its transaction
+            # (and with it replica mode), then put the indexes back.
+            db.session.rollback()
+            if skip:
+                db.session.execute(db.text("RESET session_replication_role"))
+                db.session.commit()
+            create_indexes(indexes, models)
+        reset_sequences(models)
+        elapsed = perf_counter() - started
+        total = sum(counts.values())
+        print("Bulk seeding complete: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+        print(f"{total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+        print(f"Log in as {BULK_EMAIL.format(1)} / {BULK_PASSWORD}")
+
+
 if __name__ == "__main__":
-    seed_database()
+    parser = argparse.ArgumentParser(description="Seed the database")
+    parser.add_argument('--bulk', action='store_true', help="generate a large dataset instead of the sample rows")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--movers', type=int, default=50)
+    parser.add_argument('--inventory', type=int, default=2000)
+    parser.add_argument('--inventory-per-user', type=int, default=5)
+    parser.add_argument('--moves', type=int, default=10000)
+    parser.add_argument('--quotes', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.bulk:
+        seed_bulk(args.users, args.movers, args.inventory, args.inventory_per_user, args.moves, args.quotes,
+                  args.batch_size, args.seed)
+    else:
+        seed_database()
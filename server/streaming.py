@@ -0,0 +1,35 @@
+from flask import current_app, request, Response
+from json_provider import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream():
+    # Opt in with ?stream=1 or an Accept header that prefers NDJSON over JSON.
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def stream_rows(session, stmt, serializer, batch_size=STREAM_BATCH_SIZE):
+    # yield_per turns on server-side cursors, so only one batch of rows is
+    # held in memory at a time. Each batch goes out as one chunk of
+    # newline-delimited JSON objects.
+    app = current_app._get_current_object()
+
+    def generate():
+        # The rows are read in an app context of their own, entered where the
+        # response is iterated. stream_with_context would re-push the handler's
+        # request context, which async handlers set up in another contextvars
+        # context, so popping it fails.
+        with app.app_context():
+            result = session.execute(stmt.execution_options(yield_per=batch_size))
+            encode = serializer.encode
+            try:
+                for partition in result.partitions():
+                    yield b''.join([dumps(encode(row)) + b'\n' for row in partition])
+            finally:
+                result.close()
+
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,57 @@
+import time
+from blacklist import RevocationStore
+import kvstore
+
+
+class CountingStore(kvstore.LocalRedis):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        return super().get(key)
+
+    def mget(self, keys):
+        self.calls += 1
+        return super().mget(keys)
+
+
+def test_revocations_reach_other_workers():
+    shared = kvstore.LocalRedis()
+    here, there = RevocationStore(shared, sync_interval=0), RevocationStore(shared, sync_interval=0)
+    assert 'a' not in there
+    here.add('a', time.time() + 60)
+    assert 'a' in here
+    assert 'a' in there
+    assert 'b' not in there
+
+
+def test_checks_between_syncs_stay_local():
+    shared = CountingStore()
+    store = RevocationStore(shared, sync_interval=60)
+    store.add('a', time.time() + 60)
+    assert 'a' in store
+    calls = shared.calls
+    for _ in range(100):
+        assert 'b' not in store
+        assert 'a' in store
+    assert shared.calls == calls
+
+
+def test_entry_written_after_its_position_is_read_later():
+    shared = kvstore.LocalRedis()
+    store = RevocationStore(shared, sync_interval=0)
+    # Another worker has taken position 1 but not written the entry yet.
+    shared.incr('revoked:position')
+    assert 'a' not in store
+    shared.set('revoked:log:1', f"a {time.time() + 60}", ex=60)
+    assert 'a' in store
+
+
+def test_expired_revocations_are_forgotten():
+    store = RevocationStore(sync_interval=0)
+    store.add('a', time.time() - 1)
+    store.add('b', time.time() + 0.5)
+    assert 'a' not in store
+    assert 'b' in store
@@ -0,0 +1,37 @@
+import pytest
+from flask import Flask
+from cache import ResponseCache
+import kvstore
+
+
+@pytest.fixture(params=['local', 'shared'])
+def cache(request):
+    cache = ResponseCache()
+    if request.param == 'shared':
+        cache.shared = kvstore.LocalRedis()
+    return cache
+
+
+def test_fill_racing_an_invalidate_is_not_served(cache):
+    app = Flask(__name__)
+    rows = ['old']
+
+    def producer():
+        # A write commits and invalidates while the fill is building its body.
+        value = list(rows)
+        rows[0] = 'new'
+        cache.invalidate('key')
+        return value
+
+    with app.test_request_context():
+        assert cache.cached_json('key', producer).get_json() == ['old']
+        assert cache.cached_json('key', lambda: list(rows)).get_json() == ['new']
+
+
+def test_fill_is_served_until_invalidated(cache):
+    app = Flask(__name__)
+    with app.test_request_context():
+        cache.cached_json('key', lambda: [1])
+        assert cache.cached_json('key', lambda: [2]).get_json() == [1]
+        cache.invalidate('key')
+        assert cache.cached_json('key', lambda: [3]).get_json() == [3]
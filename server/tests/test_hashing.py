@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+import pytest
+from hashing import HashingPool, HashingBusy
+
+
+def _slow(seconds, submitted_at):
+    time.sleep(seconds)
+    return None, 0.0
+
+
+def _crash(submitted_at):
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool()
+    pool.max_workers = 1
+    pool.max_queue = 1
+    pool.timeout = 0.2
+    pool._slots = threading.BoundedSemaphore(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_timeout_keeps_the_slot_until_the_job_ends(pool):
+    with pytest.raises(HashingBusy):
+        pool._run(_slow, 1.0)
+    # The timed-out job is still running, so there is no room for another.
+    with pytest.raises(HashingBusy, match="full"):
+        pool._run(_slow, 0)
+    time.sleep(1.0)
+    assert pool._run(_slow, 0) is None
+    assert pool.metrics()["timed_out"] == 1
+
+
+def test_broken_pool_is_replaced(pool):
+    with pytest.raises(HashingBusy, match="broken"):
+        pool._run(_crash)
+    assert pool._executor is None
+    assert pool._run(_slow, 0) is None
+    assert pool.metrics()["failed"] == 1
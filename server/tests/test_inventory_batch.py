@@ -0,0 +1,53 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models import db, User, Property, Inventory, InventoryUser
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.sqlite'}",
+        'SQLALCHEMY_BINDS': {},
+        'EMAIL_WORKER_ENABLED': False,
+        'GEOCODER': 'none',
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(name='Packer', email='packer@example.com', password='')
+        house = Property(property_type='House')
+        db.session.add_all([user, house])
+        db.session.flush()
+        db.session.add_all([Inventory(item_name='Sofa', property_id=house.id),
+                            Inventory(item_name='Lamp', property_id=house.id)])
+        db.session.commit()
+        client = app.test_client()
+        client.set_cookie('localhost', 'access_token', create_access_token(identity=str(user.id)))
+        yield client
+        db.session.remove()
+
+
+def batch(client, *operations):
+    response = client.post('/inventory/user/batch', json={"operations": list(operations)})
+    assert response.status_code == 200
+    return response.get_json()["results"]
+
+
+def test_adding_an_owned_item_bumps_its_quantity(client):
+    first = batch(client, {"op": "add", "inventory_id": 1, "quantity": 2})
+    assert first[0]["status"] == 201 and first[0]["quantity"] == 2
+
+    again = batch(client, {"op": "add", "inventory_id": 1, "quantity": 3, "condition": "Good"},
+                  {"op": "add", "inventory_id": 2})
+    assert [result["status"] for result in again] == [200, 201]
+    assert again[0]["id"] == first[0]["id"] and again[0]["quantity"] == 5
+    assert again[1]["quantity"] == 1
+    record = db.session.get(InventoryUser, first[0]["id"])
+    assert (record.quantity, record.condition) == (5, 'Good')
+
+
+def test_repeated_adds_in_one_batch_share_a_record(client):
+    results = batch(client, {"op": "add", "inventory_id": 2}, {"op": "add", "inventory_id": 2, "quantity": 2})
+    assert results[0]["id"] == results[1]["id"]
+    assert results[1]["quantity"] == 3
+    assert InventoryUser.query.count() == 1
@@ -0,0 +1,40 @@
+import pytest
+from app import create_app
+from models import db, Property
+from profiling import profiler
+
+
+def make_app(**config):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_BINDS': {},
+        'EMAIL_WORKER_ENABLED': False,
+        'GEOCODER': 'none',
+        **config,
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.mark.parametrize('path', ['/metrics', '/metrics/sql'])
+def test_metrics_need_the_token(path):
+    assert make_app().test_client().get(path).status_code == 404
+    client = make_app(METRICS_TOKEN='s3cret').test_client()
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+
+def test_slow_queries_are_explained_after_the_response():
+    app = make_app(SQL_SLOW_QUERY_MS=0.0)
+
+    @app.route('/count')
+    def count():
+        return str(Property.query.count())
+
+    assert app.test_client().get('/count').status_code == 200
+    profiler._slow_queue.join()
+    report = profiler.recent_slow[-1]
+    assert report["endpoint"] == 'count'
+    assert report["plan"]
@@ -0,0 +1,58 @@
+import datetime
+import pytest
+from app import create_app
+from models import db, User, Move, move_serializer
+from pagination import keyset_page
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.sqlite'}",
+        'SQLALCHEMY_BINDS': {},
+        'EMAIL_WORKER_ENABLED': False,
+        'GEOCODER': 'none',
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def add_moves(count):
+    user = User(name='Pager', email='pager@example.com', password='')
+    db.session.add(user)
+    db.session.flush()
+    # created_at comes from func.now(): on SQLite that is CURRENT_TIMESTAMP,
+    # stored without fractional seconds, so these rows share one timestamp.
+    db.session.add_all(
+        Move(user_id=user.id, from_address='A', to_address='B', move_date=datetime.datetime(2030, 1, 1),
+             move_time=datetime.time(9, 0))
+        for _ in range(count)
+    )
+    db.session.commit()
+
+
+def walk(limit, max_pages=20):
+    # Bounded: a cursor that doesn't advance would otherwise loop forever.
+    pages, cursor = [], None
+    for _ in range(max_pages):
+        rows, cursor = keyset_page(db.session, move_serializer.select(), Move.created_at, Move.id, limit, cursor)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            break
+    return pages
+
+
+def test_second_page_does_not_repeat_the_first(app):
+    add_moves(3)
+    first, second = walk(limit=1)[:2]
+    assert first != second
+    assert set(first).isdisjoint(second)
+
+
+def test_pages_cover_every_row_once(app):
+    add_moves(7)
+    ids = [row_id for page in walk(limit=2) for row_id in page]
+    assert len(ids) == 7
+    assert len(set(ids)) == 7
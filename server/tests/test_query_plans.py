@@ -0,0 +1,137 @@
+"""Every query the resources run on a large table must be able to use an index.
+
+The statements are recorded from real requests, so they are exactly what
+the resources build. They run against a throwaway SQLite database, or
+against PLAN_CHECK_DATABASE_URL: a Postgres database migrated to head, where
+sequential scans are disabled, so a Seq Scan left in a plan means no index
+can serve that query.
+"""
+import datetime
+import json
+import os
+import re
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app
+from models import db, User, Mover, Property, Move
+
+LARGE_TABLES = {'users', 'moves', 'quotes', 'bookings', 'inventory', 'inventory_users', 'move_candidates'}
+
+PG_URL = os.getenv('PLAN_CHECK_DATABASE_URL')
+
+REQUESTS = [
+    ('GET', '/moves?limit=50', None),
+    ('GET', '/moves?limit=50&move_status=Confirmed', None),
+    ('GET', '/move?limit=50', None),
+    ('GET', '/move/{move_id}', None),
+    ('GET', '/moves/{move_id}', None),
+    ('GET', '/moves/{move_id}/quotes', None),
+    ('GET', '/quote', None),
+    ('GET', '/inventory?property_id=1', None),
+    ('GET', '/inventory/user', None),
+    ('GET', '/inventory/user?search=table', None),
+    ('DELETE', '/inventory/user/{move_id}', None),
+    ('POST', '/auth/reset-password', {"reset_token": "no-such-token", "new_password": "x"}),
+    ('GET', '/inventory?search=table', None),
+]
+
+# A leading-wildcard ILIKE can only use a trigram index: Postgres with pg_trgm.
+NEEDS_TRIGRAM = {'/inventory?search=table'}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+?)(?:_\d+)?$')
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': PG_URL or f"sqlite:///{tmp_path_factory.mktemp('plans') / 'test.sqlite'}",
+        'SQLALCHEMY_BINDS': {},
+        'EMAIL_WORKER_ENABLED': False,
+        'GEOCODER': 'none',
+        'RATELIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        if not PG_URL:
+            db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    mover = Mover(company_name='Plan Movers', phone='555')
+    db.session.add_all([mover, Property(property_type='House')])
+    db.session.flush()
+    user = User(name='Plan User', email='plan-user@example.com', password='', mover_id=mover.id)
+    db.session.add(user)
+    db.session.flush()
+    move = Move(user_id=user.id, from_address='A', to_address='B', move_date=datetime.datetime(2030, 1, 1),
+                move_time=datetime.time(9, 0))
+    db.session.add(move)
+    db.session.commit()
+    client = app.test_client()
+    client.set_cookie('localhost', 'access_token', create_access_token(identity=str(user.id)))
+    client.move_id = move.id
+    yield client
+    if PG_URL:
+        db.session.delete(user)
+        db.session.delete(mover)
+        db.session.commit()
+
+
+def recorded_selects(client, method, path, body):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.open(path.format(move_id=client.move_id), method=method, json=body)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code < 500, response.get_data(as_text=True)
+    return statements
+
+
+def has_trigram():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(db.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def full_scans(statement, parameters):
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if db.engine.dialect.name == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+            plan = cursor.fetchone()[0]
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+            return set(_seq_scans(plan))
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return {match.group(1) for row in cursor.fetchall() if (match := _SQLITE_SCAN.match(row[-1]))}
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def _seq_scans(plan):
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan['Relation Name']
+    for child in plan.get('Plans', []):
+        yield from _seq_scans(child)
+
+
+@pytest.mark.parametrize('method, path, body', REQUESTS)
+def test_resource_queries_use_indexes(client, method, path, body):
+    if path in NEEDS_TRIGRAM and not has_trigram():
+        pytest.skip("needs Postgres with pg_trgm")
+    statements = recorded_selects(client, method, path, body)
+    assert statements
+    for statement, parameters in statements:
+        scanned = full_scans(statement, parameters) & LARGE_TABLES
+        assert not scanned, f"{method} {path} scans {', '.join(sorted(scanned))}:\n{statement}"
@@ -0,0 +1,33 @@
+import pytest
+from app import create_app
+from ratelimit import rate_limiter
+
+
+@pytest.fixture
+def client():
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_BINDS': {},
+        'EMAIL_WORKER_ENABLED': False,
+        'GEOCODER': 'none',
+        'RATELIMIT_ENABLED': True,
+        'RATELIMIT_STORE_URL': None,
+        'PROXY_HOPS': 1,
+    })
+
+    @app.route('/probe')
+    @rate_limiter.limit('probe', ip='1/minute')
+    def probe():
+        return 'ok'
+
+    return app.test_client()
+
+
+def get(client, address):
+    return client.get('/probe', headers={'X-Forwarded-For': address}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+
+def test_clients_behind_the_proxy_are_limited_separately(client):
+    assert get(client, '203.0.113.1').status_code == 200
+    assert get(client, '203.0.113.1').status_code == 429
+    assert get(client, '203.0.113.2').status_code == 200